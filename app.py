@@ -1,19 +1,38 @@
 import time
 
-# from src.callback.server import app
-from src.setup_bot import bot
-from src.utils.logger_config import logger
+from src.utils.import_report import import_report
 
 
 if __name__ == "__main__":
+    # Замер импортов начинается до загрузки модулей бота. И то и другое только здесь:
+    # рабочие процессы (forkserver/spawn) заново выполняют этот файл как __mp_main__
+    import_report.start()
     start_time = time.time()
 
+    # from src.callback.server import app
+    from src.setup_bot import bot
+    from src.utils.logger_config import logger
+    from src.constants import GRAPH_WARMUP
+    from src.database import adb
+    from src.funstat import funstat
+    from src.graphs import graph_renderer
     from src.setup_callbacks import setup_callbacks
     from src.setup_handlers import setup_handlers
 
     setup_callbacks()
     setup_handlers()
-    bot.run()
+    import_report.stop()
+    logger.info(import_report.format())
+    if GRAPH_WARMUP:
+        graph_renderer.warm_up()
+    # Сессия FunStat создаётся в том же цикле событий, в котором работает бот
+    bot.loop.run_until_complete(funstat.start())
+    try:
+        bot.run()
+    finally:
+        bot.loop.run_until_complete(funstat.close())
+        # Дожидаемся запросов к БД и дописываем отложенные записи
+        adb.close()
     # app.run(host="localhost", port=3005)
     total_time = round(time.time() - start_time, 2)
     logger.info(
@@ -0,0 +1,82 @@
+"""
+Задержка цикла событий во время тяжёлого запроса (get_most_common_word):
+прямой синхронный вызов Database против AsyncDatabase.
+
+Запуск из корня репозитория:
+    python -m benchmarks.event_loop_lag
+"""
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from src.database import AsyncDatabase, Database
+
+MESSAGES = 100_000
+TICK = 0.005
+
+
+def fill(database: Database, rng: random.Random) -> None:
+    words = [f"word{i}" for i in range(5_000)]
+    with database.connections.write() as cursor:
+        cursor.executemany(
+            "INSERT INTO messages (chat_id, user_id, message_text) VALUES (?, ?, ?)",
+            (
+                (1, rng.randrange(1_000), " ".join(rng.choices(words, k=20)))
+                for _ in range(MESSAGES)
+            ),
+        )
+
+
+async def measure_lag(heavy) -> tuple:
+    """
+    Пока выполняется heavy(), тикер каждые TICK секунд замеряет, насколько позже
+    положенного он проснулся.
+
+    :return: Кортеж (время запроса, средняя задержка, максимальная задержка) в мс.
+    """
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - started - TICK)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 4)
+    started = time.perf_counter()
+    await heavy()
+    elapsed = time.perf_counter() - started
+    done.set()
+    await task
+    return elapsed * 1e3, sum(lags) / len(lags) * 1e3, max(lags) * 1e3
+
+
+async def run(database: Database, adb: AsyncDatabase) -> None:
+    async def direct() -> None:
+        database.get_most_common_word(limit=20)
+
+    async def facade() -> None:
+        await adb.get_most_common_word(limit=20)
+
+    print(f"{'mode':>8} {'query, ms':>10} {'avg lag, ms':>12} {'max lag, ms':>12}")
+    for name, heavy in (("sync", direct), ("async", facade)):
+        query_ms, avg_lag, max_lag = await measure_lag(heavy)
+        print(f"{name:>8} {query_ms:>10.1f} {avg_lag:>12.2f} {max_lag:>12.2f}")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, "bench.db"))
+        fill(database, random.Random(42))
+        adb = AsyncDatabase(database)
+        asyncio.run(run(database, adb))
+        adb.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Проверка FunStatClient без сети: поднимает локальную заглушку FunStat API
+и сравнивает новую сессию на каждый запрос (как было раньше) с общим клиентом
+(пул соединений, объединение одинаковых запросов, кэш отрицательных результатов).
+
+Запуск из корня репозитория:
+    python -m benchmarks.funstat
+"""
+
+import asyncio
+import os
+import random
+import time
+
+from aiohttp import ClientSession, web
+
+# src.constants требует переменные окружения бота; для заглушки подойдут любые значения
+for name in ("TOKEN", "BOT_TOKEN", "API_ID", "API_HASH"):
+    os.environ.setdefault(name, "stub")
+
+from src.funstat import FunStatClient  # noqa: E402
+
+CHECKS = 2_000
+USERS = 200
+LATENCY = 0.02
+
+# Число запросов, обработанных заглушкой
+served = {"requests": 0}
+
+
+async def stub_stats(request: web.Request) -> web.Response:
+    """
+    Заглушка /api/v1/users/{user_id}/stats_min: чётные пользователи — старые аккаунты,
+    нечётные — молодые, каждый сотый неизвестен.
+    """
+    served["requests"] += 1
+    await asyncio.sleep(LATENCY)
+    user_id = int(request.match_info["user_id"])
+    if user_id % 100 == 0:
+        return web.json_response({}, status=404)
+    first_msg_date = (
+        "2020-01-01T00:00:00Z" if user_id % 2 == 0 else "2099-01-01T00:00:00Z"
+    )
+    return web.json_response(
+        {"first_msg_date": first_msg_date, "messages_count": 10, "chats_count": 1}
+    )
+
+
+async def per_call_session(base_url: str, user_id: int) -> bool:
+    async with ClientSession() as session:
+        async with session.get(f"{base_url}/api/v1/users/{user_id}/stats_min") as r:
+            return r.status == 200 and "2020" in (await r.json()).get("first_msg_date")
+
+
+async def run() -> None:
+    app = web.Application()
+    app.router.add_get("/api/v1/users/{user_id}/stats_min", stub_stats)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    rng = random.Random(42)
+    # Рейд: одни и те же пользователи проверяются много раз подряд
+    user_ids = [rng.randrange(1, USERS + 1) for _ in range(CHECKS)]
+
+    print(f"{'mode':>12} {'checks':>7} {'requests':>9} {'time, s':>8} {'verified':>9}")
+
+    # Как было раньше: новая сессия на каждую проверку, без ограничения и без кэша
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(per_call_session(base_url, user_id) for user_id in user_ids)
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"{'per-call':>12} {CHECKS:>7} {served['requests']:>9} {elapsed:>8.2f}"
+        f" {sum(results):>9}"
+    )
+
+    client = FunStatClient(base_url, "stub")
+    await client.start()
+    # Две волны: во второй отрицательные результаты уже в кэше
+    for name in ("client", "client (2)"):
+        served["requests"] = 0
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client.check(u) for u in user_ids))
+        elapsed = time.perf_counter() - started
+        verified = sum(result is not None for result in results)
+        print(
+            f"{name:>12} {CHECKS:>7} {served['requests']:>9} {elapsed:>8.2f}"
+            f" {verified:>9}"
+        )
+    print(
+        f"coalesced: {client.coalesced}, cached negatives: {client.cached},"
+        f" requests: {client.requests}"
+    )
+    await client.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
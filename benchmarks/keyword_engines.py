@@ -0,0 +1,60 @@
+"""
+Сравнение движков поиска запрещённых слов: прежней альтернативы re и Ахо-Корасик.
+
+Запуск из корня репозитория:
+    python -m benchmarks.keyword_engines
+"""
+
+import random
+import string
+import time
+
+from src.spam.engines import build_engine
+
+SIZES = (100, 1_000, 10_000)
+MESSAGES = 2_000
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12)))
+
+
+def make_corpus(rng: random.Random, keywords: list) -> list:
+    """
+    Сообщения из случайных слов, примерно в каждом десятом — запрещённое слово.
+    """
+    corpus = []
+    for _ in range(MESSAGES):
+        words = [random_word(rng) for _ in range(rng.randint(5, 40))]
+        if rng.random() < 0.1:
+            words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def measure(engine, corpus: list) -> float:
+    started = time.perf_counter()
+    for text in corpus:
+        engine.find_all(text)
+    return (time.perf_counter() - started) / len(corpus) * 1e6
+
+
+def main() -> None:
+    rng = random.Random(42)
+    print(f"{'words':>7} {'engine':>7} {'build, ms':>10} {'scan, us/msg':>13}")
+    for size in SIZES:
+        keywords = sorted(
+            {random_word(rng) for _ in range(size)}, key=len, reverse=True
+        )
+        corpus = make_corpus(rng, keywords)
+        for name in ("regex", "hybrid"):
+            started = time.perf_counter()
+            engine = build_engine(keywords, name)
+            build_ms = (time.perf_counter() - started) * 1e3
+            print(
+                f"{size:>7} {name:>7} {build_ms:>10.1f} {measure(engine, corpus):>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Сравнение нормализации текста из src.spam.normalization с прямым вызовом
+unidecode(text.lower().strip()) на сообщениях из таблицы messages.
+
+Запуск из корня репозитория:
+    python -m benchmarks.normalization [путь к antispam.db]
+"""
+
+import random
+import sqlite3
+import sys
+import time
+
+import unidecode
+
+from src.spam.normalization import (
+    _normalize_cached,
+    normalize_text,
+    normalize_with_offsets,
+    transliterate,
+)
+
+MESSAGES = 5_000
+
+
+def load_corpus(db_file: str) -> list:
+    """
+    Последние MESSAGES сообщений из базы бота.
+    """
+    try:
+        with sqlite3.connect(f"file:{db_file}?mode=ro", uri=True) as connection:
+            rows = connection.execute(
+                "SELECT message_text FROM messages WHERE message_text != ''"
+                " ORDER BY id DESC LIMIT ?",
+                (MESSAGES,),
+            ).fetchall()
+    except sqlite3.Error as e:
+        print(f"{db_file}: {e}")
+        return []
+    return [row[0] for row in rows if row[0]]
+
+
+def synthetic_corpus(rng: random.Random) -> list:
+    """
+    Запасной корпус, если базы нет: обычные сообщения (часть — только ASCII)
+    и рассылки, в которых одни и те же тексты с гомоглифами повторяются много раз.
+    """
+    ascii_pieces = ["hello", "free", "crypto", "@user", "1000$", "ok", "\n"]
+    pieces = ascii_pieces + [
+        "привет", "всем", "заработок", "➡️", "рrеmium", "ｆｒｅｅ", "𝐟𝐫𝐞𝐞", "café", "—", "«тут»",
+    ]  # fmt: skip
+    regular = [
+        " ".join(rng.choices(rng.choice([ascii_pieces, pieces]), k=rng.randint(3, 40)))
+        for _ in range(MESSAGES // 2)
+    ]
+    waves = [" ".join(rng.choices(pieces, k=rng.randint(10, 40))) for _ in range(50)]
+    corpus = regular + rng.choices(waves, k=MESSAGES // 2)
+    rng.shuffle(corpus)
+    return corpus
+
+
+def measure(function, corpus: list) -> float:
+    started = time.perf_counter()
+    for text in corpus:
+        function(text)
+    return (time.perf_counter() - started) / len(corpus) * 1e6
+
+
+def main() -> None:
+    db_file = sys.argv[1] if len(sys.argv) > 1 else "antispam.db"
+    corpus = load_corpus(db_file)
+    source = db_file
+    if not corpus:
+        corpus = synthetic_corpus(random.Random(42))
+        source = "synthetic"
+
+    for text in corpus:
+        expected = unidecode.unidecode(text.lower().strip())
+        assert transliterate(text.lower().strip()) == expected, text
+        assert normalize_with_offsets(text)[0] == expected, text
+    ascii_share = sum(text.isascii() for text in corpus) / len(corpus)
+    print(
+        f"corpus: {source}, {len(corpus)} messages, {ascii_share:.0%} ASCII,"
+        f" {len(set(corpus))} unique; equivalence OK"
+    )
+
+    _normalize_cached.cache_clear()
+    rows = [
+        ("unidecode", lambda text: unidecode.unidecode(text.lower().strip())),
+        ("transliterate", lambda text: transliterate(text.lower().strip())),
+        ("normalize_text", normalize_text),
+        ("normalize_text (warm)", normalize_text),
+    ]
+    print(f"{'function':>22} {'us/msg':>8}")
+    for name, function in rows:
+        print(f"{name:>22} {measure(function, corpus):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
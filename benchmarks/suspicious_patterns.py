@@ -0,0 +1,47 @@
+"""
+Сравнение скорости токенного детектора подозрительных конструкций с прежними
+регулярками из search_keywords (их сверка — tests/test_suspicious.py).
+
+Запуск из корня репозитория:
+    python -m benchmarks.suspicious_patterns
+"""
+
+import random
+import time
+
+from src.spam.suspicious import detect_suspicious
+from tests.test_suspicious import legacy_rules
+
+
+def measure(function, corpus: list) -> float:
+    started = time.perf_counter()
+    for text in corpus:
+        function(text)
+    return (time.perf_counter() - started) / len(corpus) * 1e6
+
+
+def main() -> None:
+    rng = random.Random(42)
+
+    # Обычные сообщения, сообщения с упоминаниями и без триггеров (худший случай
+    # для ".*?": каждое упоминание заставляет регулярку просматривать строку до конца)
+    corpora = {
+        "plain": ["hello", "world", "канал", "sale", "premium", "тут"],
+        "mixed": ["hello", "world", "premium", "канал", "@user", "тут", "➡️", "sale"],
+        "mentions": ["hello", "world", "канал", "@user", "sale"],
+    }
+    print(f"{'words':>6} {'corpus':>9} {'regex, us':>10} {'tokens, us':>11}")
+    for length in (20, 200, 2_000):
+        for name, words in corpora.items():
+            corpus = [
+                " ".join(rng.choices(words, k=length)) for _ in range(2_000 // length)
+            ]
+            print(
+                f"{length:>6} {name:>9}"
+                f" {measure(legacy_rules, corpus):>10.1f}"
+                f" {measure(detect_suspicious, corpus):>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from pyrogram.client import Client
+from pyrogram.enums import ChatMembersFilter, ChatMemberStatus
+
+from src.database import adb
+from src.utils.logger_config import logger
+
+# Статусы участника, дающие права администратора в чате
+ADMIN_STATUSES = (ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER)
+
+# Ключ записи с глобальными администраторами бота (users.admin = 1)
+GLOBAL = 0
+
+
+class AdminCache:
+    """
+    Кэш списков администраторов по чатам. Список чата загружается одним запросом
+    get_chat_members(filter=ADMINISTRATORS) и хранится ttl секунд, вместо запроса
+    get_chat_member на каждую проверку. При изменении прав участника запись чата
+    сбрасывается через invalidate. Одновременные проверки в одном чате (например,
+    во время рейда) ждут одну и ту же загрузку. Если список не удалось загрузить
+    (FloodWait, ошибка сети), остаётся последний успешно загруженный список,
+    а без него права проверяются по одному участнику через get_chat_member.
+    """
+
+    def __init__(self, ttl: float = 600.0, error_ttl: float = 30.0) -> None:
+        """
+        :param ttl: Время жизни списка администраторов, в секундах.
+        :param error_ttl: Через сколько секунд повторить загрузку после ошибки.
+        """
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        # chat_id -> (момент истечения, администраторы или None, если список неизвестен)
+        self._entries: Dict[int, Tuple[float, Optional[FrozenSet[int]]]] = {}
+        self._loading: Dict[int, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def is_admin(self, client: Client, chat_id: int, user_id: int) -> bool:
+        """
+        Проверяет, является ли пользователь администратором чата или глобальным
+        администратором бота.
+
+        :param client: Объект клиента Pyrogram.
+        :param chat_id: Идентификатор чата (int).
+        :param user_id: Идентификатор пользователя (int).
+        :return: True, если пользователь — администратор, иначе False.
+        """
+        if user_id in (await self.get(client, GLOBAL) or ()):
+            return True
+        # У личных чатов (положительный id) администраторов нет
+        if chat_id >= 0:
+            return False
+        admins = await self.get(client, chat_id)
+        if admins is None:
+            return await self._check_member(client, chat_id, user_id)
+        return user_id in admins
+
+    async def get(self, client: Client, chat_id: int) -> Optional[FrozenSet[int]]:
+        """
+        Возвращает идентификаторы администраторов чата, загружая их при необходимости.
+
+        :param client: Объект клиента Pyrogram.
+        :param chat_id: Идентификатор чата (int) или GLOBAL.
+        :return: Множество идентификаторов пользователей или None, если список
+            не удалось загрузить и успешно загруженного раньше нет.
+        """
+        entry = self._entries.get(chat_id)
+        if entry is not None and entry[0] >= time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+
+        task = self._loading.get(chat_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(client, chat_id))
+            self._loading[chat_id] = task
+            task.add_done_callback(lambda done: self._store(chat_id, done))
+        # Отмена одного ожидающего обработчика не должна отменять общую загрузку
+        return (await asyncio.shield(task))[1]
+
+    def _store(self, chat_id: int, task: asyncio.Task) -> None:
+        # Загрузка, начатая до invalidate, могла получить устаревший список
+        if self._loading.get(chat_id) is task:
+            del self._loading[chat_id]
+            if not task.cancelled():
+                self._entries[chat_id] = task.result()
+
+    async def _load(
+        self, client: Client, chat_id: int
+    ) -> Tuple[float, Optional[FrozenSet[int]]]:
+        ttl = self.ttl
+        admins: Optional[FrozenSet[int]]
+        try:
+            if chat_id == GLOBAL:
+                admins = frozenset(await adb.get_admins())
+            else:
+                admins = frozenset(
+                    [
+                        member.user.id
+                        async for member in client.get_chat_members(
+                            chat_id, filter=ChatMembersFilter.ADMINISTRATORS
+                        )
+                    ]
+                )
+        except Exception as e:
+            logger.error(f"Error loading admins of {chat_id}: {e}")
+            # Ошибка — не повод считать, что администраторов нет: оставляем последний
+            # известный список и повторяем загрузку через error_ttl
+            previous = self._entries.get(chat_id)
+            admins = previous[1] if previous is not None else None
+            ttl = self.error_ttl
+        return time.monotonic() + ttl, admins
+
+    async def _check_member(self, client: Client, chat_id: int, user_id: int) -> bool:
+        try:
+            member = await client.get_chat_member(chat_id, user_id)
+        except Exception as e:
+            logger.error(f"Error checking admin status of {user_id} in {chat_id}: {e}")
+            return False
+        return member.status in ADMIN_STATUSES
+
+    def invalidate(self, chat_id: int) -> None:
+        """
+        Удаляет список администраторов чата, чтобы следующая проверка загрузила его заново.
+
+        :param chat_id: Идентификатор чата (int) или GLOBAL.
+        :return: None
+        """
+        self._entries.pop(chat_id, None)
+        self._loading.pop(chat_id, None)
+
+
+admin_cache = AdminCache()
@@ -12,6 +12,10 @@ account_id = os.getenv("UMONEYaccount_id")
 secret_key = os.getenv("UMONEYsecretKey")
 
 token = os.getenv("TOKEN") or exit("TOKEN is not set")
+# Адрес FunStat API; для проверки без сети можно указать локальную заглушку
+FUNSTAT_URL = os.getenv("FUNSTAT_URL", "https://funstat.org")
+# Загрузить matplotlib в процессах отрисовки графиков сразу при запуске, а не при первом графике
+GRAPH_WARMUP = os.getenv("GRAPH_WARMUP", "0") == "1"
 bot_token = os.getenv("BOT_TOKEN") or exit("BOT_TOKEN is not set")
 api_id = os.getenv("API_ID") or exit("API_ID is not set")
 api_hash = os.getenv("API_HASH") or exit("API_HASH is not set")
@@ -52,3 +56,8 @@ ARG_DEFINITIONS = {
     "limit": (int, 20),
     "reverse": (Boolean, False),  # Пример строкового аргумента
 }
+# Аргументы команды /dashboard: период в днях и число чатов на графике
+DASHBOARD_ARGS = {
+    "days": (int, 30),
+    "limit": (int, 10),
+}
@@ -1,111 +1,280 @@
+import asyncio
+import json
 import os
 import re
 import sqlite3
-from collections import Counter, defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime, date
-from typing import List, Optional, Union, Tuple
-
-import matplotlib.pyplot as plt
-import numpy as np
-import unidecode
-from matplotlib.dates import DateFormatter, date2num
-from matplotlib.ticker import MaxNLocator
-from scipy.interpolate import make_interp_spline
-
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import datetime, date, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Union, Tuple
+
+from src.graphs import graph_renderer
+from src.spam.normalization import transliterate
+from src.spam.regex_safety import find_unsafe_construct
 from src.utils.logger_config import logger
 
 
-def smooth_line(
-    x: Union[np.ndarray, list], y: Union[np.ndarray, list], num_points: int = 300
-) -> Tuple[np.ndarray, np.ndarray]:
+class ConnectionManager:
     """
-    Функция выполняет кубическую интерполяцию (сплайн) для сглаживания линий.
-
-    :param x: Набор исходных значений по оси X (список или массив NumPy).
-    :param y: Набор исходных значений по оси Y (список или массив NumPy).
-    :param num_points: Количество точек, до которого нужно расширить/интерполировать данные.
-    :return: Кортеж из двух массивов NumPy (x_new, y_smooth), где:
-             - x_new: Новый набор точек по оси X,
-             - y_smooth: Интерполированные (сглаженные) значения по оси Y.
+    Соединения с SQLite: одно соединение для записи, доступ к которому сериализуется
+    блокировкой, и по одному соединению только для чтения на каждый поток.
+    База работает в режиме WAL: читатели видят последнее зафиксированное состояние
+    и не блокируют запись, а запись не блокирует чтение. Курсоры создаются
+    на каждую операцию и закрываются после неё.
     """
-    x_array = np.array(x, dtype=float)
-    y_array = np.array(y, dtype=float)
 
-    x_new = np.linspace(x_array.min(), x_array.max(), num_points)
-    spl = make_interp_spline(x_array, y_array, k=3)  # Кубический сплайн
-    y_smooth = spl(x_new)
-    return x_new, y_smooth
+    PRAGMAS = (
+        # В режиме WAL NORMAL не теряет целостность, но не делает fsync на каждый коммит
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA cache_size = -32000",  # ~32 МБ кэша страниц на соединение
+        "PRAGMA mmap_size = 268435456",  # 256 МБ отображаемого в память файла
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA busy_timeout = 5000",
+    )
 
+    def __init__(self, db_file: str) -> None:
+        """
+        :param db_file: Путь к файлу базы данных (строка).
+        """
+        self.db_file = db_file
+        self.lock = threading.RLock()
+        self.writer = self._connect()
+        self.writer.execute("PRAGMA journal_mode = WAL")
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        if read_only:
+            uri = f"{Path(self.db_file).absolute().as_uri()}?mode=ro"
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            connection = sqlite3.connect(self.db_file, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            connection.execute(pragma)
+        return connection
 
-def generate_plot(data: Tuple[int, List[Tuple[str]], List[Tuple[str]], str]) -> str:
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Курсор соединения для записи. Изменения фиксируются при выходе из блока
+        и откатываются, если в нём возникло исключение.
+        """
+        with self.lock:
+            cursor = self.writer.cursor()
+            try:
+                with self.writer:
+                    yield cursor
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Курсор соединения только для чтения, принадлежащего текущему потоку.
+        """
+        connection = getattr(self._local, "reader", None)
+        if connection is None:
+            connection = self._local.reader = self._connect(read_only=True)
+            with self._readers_lock:
+                self._readers.append(connection)
+        cursor = connection.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    def close(self) -> None:
+        """
+        Закрывает соединение для записи и все соединения для чтения.
+
+        :return: None
+        """
+        with self._readers_lock:
+            for connection in self._readers:
+                connection.close()
+            self._readers.clear()
+        with self.lock:
+            self.writer.close()
+
+
+class WriteBehindQueue:
     """
-    Генерирует и сохраняет график, показывающий динамику сообщений по датам и удалённых (спам) сообщений.
-
-    :param data: Кортеж вида (chat_id, raw_dates, raw_deleted_dates, output_dir), где:
-                 - chat_id: Идентификатор чата (целое число),
-                 - raw_dates: Список кортежей с датами (строки), когда были написаны сообщения,
-                 - raw_deleted_dates: Список кортежей с датами (строки), когда сообщения были помечены как спам,
-                 - output_dir: Путь к директории, в которую следует сохранить итоговый график.
-    :return: Путь к сохранённому графику (строка).
+    Очередь отложенной записи. Частые записи (сообщения, пользователи, предупреждения,
+    статистика) копятся в памяти и выполняются одной транзакцией, когда набралось
+    max_rows строк или прошло max_delay секунд с первой отложенной записи.
+    Все запросы выполняются строго в порядке поступления, в том числе запросы разных
+    видов; подряд идущие запросы одного вида выполняются одним executemany.
+    Вне цикла событий asyncio запись выполняется сразу. Если задан executor (поток
+    записи AsyncDatabase), пачки записываются только в нём: flush из других потоков
+    ставит запись в этот поток и ждёт её, поэтому пачки не фиксируются в обратном порядке.
     """
-    chat_id, raw_dates, raw_deleted_dates, output_dir = data
-
-    # Преобразуем даты в объекты datetime.date
-    dates: List[date] = [
-        datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S").date() for row in raw_dates
-    ]
-
-    # Подсчёт количества сообщений по дням
-    daily_messages: defaultdict[date, int] = defaultdict(int)
-    for d in dates:
-        daily_messages[d] += 1
-
-    # Подсчёт удалённых (спам) сообщений по дням
-    daily_deleted_messages: defaultdict[date, int] = defaultdict(int)
-    for row in raw_deleted_dates:
-        d = datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S").date()
-        daily_deleted_messages[d] += 1
-
-    # Преобразуем даты в числовой формат для графика
-    dates_numeric = date2num(list(daily_messages.keys()))
-    deleted_dates_numeric = date2num(list(daily_deleted_messages.keys()))
-
-    # Построение графика
-    with plt.style.context("dark_background"):
-        fig, ax = plt.subplots(figsize=(20, 10))
-
-        ax.plot(
-            dates_numeric,
-            list(daily_messages.values()),
-            label="Всего сообщений",
-        )
-        ax.plot(
-            deleted_dates_numeric,
-            list(daily_deleted_messages.values()),
-            label="Удалено сообщений",
-        )
 
-        # Настройки графика
-        ax.set_title(f"Статистика для чата {chat_id} за всё время", fontsize=20)
-        ax.set_xlabel("Дата", fontsize=16)
-        ax.set_ylabel("Количество", fontsize=16)
-        ax.legend(fontsize=12)
-        ax.grid(axis="y", linestyle="--", alpha=0.85)
-        ax.xaxis.set_major_locator(MaxNLocator(10))
+    def __init__(
+        self,
+        connections: "ConnectionManager",
+        max_rows: int = 200,
+        max_delay: float = 0.25,
+    ) -> None:
+        """
+        :param connections: Соединения с базой данных.
+        :param max_rows: Количество строк, при котором пачка записывается немедленно.
+        :param max_delay: Максимальная задержка записи, в секундах.
+        """
+        self.connections = connections
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.executor: Optional[Executor] = None
+        self._writer_thread: Optional[int] = None
+        self._pending: List[Tuple[str, tuple]] = []
+        # Сколько пачек сейчас записывается (уже забраны из очереди, но не зафиксированы)
+        self._writing = 0
+        self._lock = threading.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def bind_writer(self) -> None:
+        """
+        Запоминает текущий поток как поток записи (инициализатор потока executor).
+
+        :return: None
+        """
+        self._writer_thread = threading.get_ident()
+
+    def add(self, query: str, params: tuple) -> None:
+        """
+        Откладывает запись.
+
+        :param query: SQL-запрос с параметрами "?".
+        :param params: Параметры запроса.
+        :return: None
+        """
+        with self._lock:
+            self._pending.append((query, params))
+            rows = len(self._pending)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if rows >= self.max_rows:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self.executor is not None:
+            self.executor.submit(self._write)
+        else:
+            self._write()
+
+    def flush(self) -> None:
+        """
+        Записывает все отложенные строки одной транзакцией. Вызывается перед чтением,
+        чтобы запрос увидел отложенные записи; из потоков, отличных от потока записи,
+        дожидается записи в нём.
+
+        :return: None
+        """
+        if self.executor is None or threading.get_ident() == self._writer_thread:
+            self._write()
+        elif self._pending or self._writing:
+            self.executor.submit(self._write).result()
+
+    def _write(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            self._writing += 1
+        try:
+            self._commit(pending)
+        finally:
+            with self._lock:
+                self._writing -= 1
+
+    def _commit(self, pending: List[Tuple[str, tuple]]) -> None:
+        # Подряд идущие запросы одного вида объединяются в один executemany
+        runs: List[Tuple[str, List[tuple]]] = []
+        for query, params in pending:
+            if runs and runs[-1][0] == query:
+                runs[-1][1].append(params)
+            else:
+                runs.append((query, [params]))
+        try:
+            with self.connections.write() as cursor:
+                for query, rows in runs:
+                    cursor.executemany(query, rows)
+        except sqlite3.Error as e:
+            # Если транзакция не удалась, строки записываются по одной, чтобы одна
+            # ошибочная строка не потянула за собой пачку
+            logger.error(f"Error flushing write-behind batch: {e}")
+            self._replay(pending)
+
+    def _replay(self, pending: List[Tuple[str, tuple]]) -> None:
+        for query, params in pending:
+            try:
+                with self.connections.write() as cursor:
+                    cursor.execute(query, params)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing deferred row {params!r}: {e}")
 
-        # Форматирование оси X
-        date_formatter = DateFormatter("%Y-%m-%d")
-        ax.xaxis.set_major_formatter(date_formatter)
-        plt.xticks(rotation=45)
 
-        # Сохранение графика
-        os.makedirs(output_dir, exist_ok=True)
-        file_path = os.path.join(output_dir, f"chat_{chat_id}_stats_over_time.png")
-        plt.savefig(file_path, dpi=300)
-        plt.close(fig)
+@dataclass(frozen=True)
+class ChatSettings:
+    """
+    Настройки чата, хранящиеся в колонке chats.settings в виде JSON.
 
-    return file_path
+    :param autoclean: Автомодерация: подозрительные сообщения удаляются без
+        подтверждения администратора.
+    """
+
+    autoclean: bool = False
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> "ChatSettings":
+        """
+        Разбирает значение колонки settings. Неизвестные ключи игнорируются,
+        отсутствующие получают значения по умолчанию.
+
+        :param raw: JSON-строка или None.
+        :return: Объект ChatSettings.
+        """
+        if not raw:
+            return DEFAULT_CHAT_SETTINGS
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            logger.error(f"Invalid chat settings: {raw!r}")
+            return DEFAULT_CHAT_SETTINGS
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+    def to_json(self) -> str:
+        """
+        :return: JSON-строка для колонки settings.
+        """
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+
+DEFAULT_CHAT_SETTINGS = ChatSettings()
+
+# Файл, в котором старые версии бота хранили список чатов с автомодерацией
+AUTOS_FILE = "autos.txt"
 
 
 class Database:
@@ -114,15 +283,64 @@ class Database:
     информацией о чатах, пользователях, сообщениях и статистике.
     """
 
+    # Сколько последних пользователей помнит add_user, чтобы не перезаписывать
+    # неизменившиеся имена
+    USER_CACHE_SIZE = 10_000
+
+    # Сколько идентификаторов подставляется в один запрос IN (...): старые сборки
+    # SQLite ограничивают число параметров 999
+    MAX_VARIABLES = 500
+
     def __init__(self, db_file: str) -> None:
         """
-        Конструктор. Устанавливает соединение с файлом базы данных и создаёт таблицы (если их нет).
+        Конструктор. Открывает соединения с файлом базы данных и создаёт таблицы (если их нет).
 
         :param db_file: Путь к файлу базы данных (строка).
         """
-        self.connection = sqlite3.connect(db_file)
-        self.cursor = self.connection.cursor()
+        self.connections = ConnectionManager(db_file)
+        # Версии наборов запрещённых слов по чатам: растут при каждом изменении набора,
+        # по ним кэш скомпилированных матчеров понимает, что его нужно пересобрать.
+        self.badwords_versions: defaultdict[int, int] = defaultdict(int)
+        # Частые записи на каждое сообщение откладываются и пишутся пачками
+        self.write_behind = WriteBehindQueue(self.connections)
+        # Состояние ожидания бана держится в памяти, чтобы не сканировать users на каждое
+        # сообщение: счётчики предупреждений, пользователи, которых не нужно помечать
+        # (администраторы и уже забаненные), и сами помеченные на бан
+        self.spam_counts: Dict[int, int] = {}
+        self.ban_exempt: Set[int] = set()
+        self.pending_bans: Set[int] = set()
+        # Настройки чатов (колонка chats.settings): читаются из памяти, пишутся сразу в базу
+        self.chat_settings: Dict[int, ChatSettings] = {}
+        # Активные чаты и их названия, чтобы не писать чат в базу на каждое сообщение
+        self.known_chats: Dict[int, Optional[str]] = {}
+        # LRU последних записанных профилей: user_id -> (first_name, username)
+        self.user_profiles: "OrderedDict[int, Tuple[Optional[str], Optional[str]]]" = (
+            OrderedDict()
+        )
+        # День, за который последний раз удалялись старые авторы chat_daily_users
+        self.daily_users_day = date.today()
         self.create_tables()
+        self.load_ban_state()
+        self.load_chat_settings()
+        self.load_known_chats()
+
+    def flush(self) -> None:
+        """
+        Записывает в базу все отложенные изменения (см. WriteBehindQueue).
+
+        :return: None
+        """
+        self.write_behind.flush()
+
+    def close(self) -> None:
+        """
+        Записывает отложенные изменения, закрывает все соединения и пул отрисовки графиков.
+
+        :return: None
+        """
+        self.write_behind.flush()
+        self.connections.close()
+        graph_renderer.close()
 
     def create_tables(self) -> None:
         """
@@ -132,130 +350,248 @@ class Database:
 
         :return: None
         """
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                hashed_user_id TEXT,
-                first_name TEXT,
-                username TEXT,
-                join_date TIMESTAMP,
-                spam_count INTEGER DEFAULT 0,
-                is_banned BOOLEAN DEFAULT 0,
-                ban_pending BOOLEAN DEFAULT 0,
-                admin BOOLEAN DEFAULT 0
+        with self.connections.write() as cursor:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id INTEGER PRIMARY KEY,
+                    hashed_user_id TEXT,
+                    first_name TEXT,
+                    username TEXT,
+                    join_date TIMESTAMP,
+                    spam_count INTEGER DEFAULT 0,
+                    is_banned BOOLEAN DEFAULT 0,
+                    ban_pending BOOLEAN DEFAULT 0,
+                    admin BOOLEAN DEFAULT 0
+                )
+                """
             )
-            """
-        )
 
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS verified_users (
-                user_id INTEGER PRIMARY KEY,
-                hashed_user_id TEXT,
-                first_name TEXT,
-                username TEXT,
-                verified_at TIMESTAMP,
-                first_message_date TEXT,
-                messages_count INTEGER,
-                chats_count INTEGER
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS verified_users (
+                    user_id INTEGER PRIMARY KEY,
+                    hashed_user_id TEXT,
+                    first_name TEXT,
+                    username TEXT,
+                    verified_at TIMESTAMP,
+                    first_message_date TEXT,
+                    messages_count INTEGER,
+                    chats_count INTEGER
+                )
+                """
             )
-            """
-        )
 
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS chats (
-                chat_id INTEGER PRIMARY KEY,
-                hashed_chat_id TEXT,
-                title TEXT,
-                join_date TIMESTAMP,
-                settings TEXT,
-                is_active BOOLEAN DEFAULT 1
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chats (
+                    chat_id INTEGER PRIMARY KEY,
+                    hashed_chat_id TEXT,
+                    title TEXT,
+                    join_date TIMESTAMP,
+                    settings TEXT,
+                    is_active BOOLEAN DEFAULT 1
+                )
+                """
             )
-            """
-        )
 
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                chat_id INTEGER,
-                user_id INTEGER,
-                message_text TEXT,
-                timestamp TIMESTAMP,
-                is_spam BOOLEAN,
-                link TEXT,
-                FOREIGN KEY (chat_id) REFERENCES chats (chat_id),
-                FOREIGN KEY (user_id) REFERENCES verified_users (user_id)
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id INTEGER,
+                    user_id INTEGER,
+                    message_text TEXT,
+                    timestamp TIMESTAMP,
+                    is_spam BOOLEAN,
+                    link TEXT,
+                    FOREIGN KEY (chat_id) REFERENCES chats (chat_id),
+                    FOREIGN KEY (user_id) REFERENCES verified_users (user_id)
+                )
+                """
             )
-            """
+
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS statistics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id INTEGER UNIQUE,
+                    total_messages INTEGER DEFAULT 0,
+                    deleted_messages INTEGER DEFAULT 0,
+                    total_users INTEGER DEFAULT 0,
+                    banned_users INTEGER DEFAULT 0,
+                    last_updated TIMESTAMP,
+                    FOREIGN KEY (chat_id) REFERENCES chats (chat_id)
+                )
+                """
+            )
+
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chat_badwords (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id INTEGER,
+                    word TEXT,
+                    added_by INTEGER,
+                    added_at TIMESTAMP,
+                    quarantined BOOLEAN DEFAULT 0,
+                    FOREIGN KEY (chat_id) REFERENCES chats (chat_id),
+                    FOREIGN KEY (added_by) REFERENCES verified_users (user_id),
+                    UNIQUE(chat_id, word)
+                )
+                """
+            )
+
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS spam_warnings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    chat_id INTEGER,
+                    message_text TEXT,
+                    warning_date TIMESTAMP,
+                    is_confirmed BOOLEAN DEFAULT 0,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id),
+                    FOREIGN KEY (chat_id) REFERENCES chats (chat_id)
+                )
+                """
+            )
+
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS banwords_preset (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    words TEXT,
+                    name TEXT
+                )
+                """
+            )
+
+            # Колонка quarantined появилась позже: в существующих базах её нужно добавить
+            cursor.execute("PRAGMA table_info(chat_badwords)")
+            if "quarantined" not in {row[1] for row in cursor.fetchall()}:
+                cursor.execute(
+                    "ALTER TABLE chat_badwords ADD COLUMN quarantined BOOLEAN DEFAULT 0"
+                )
+
+            # Создание индексов для повышения производительности некоторых запросов
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_messages_user_id ON messages(user_id)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chat_badwords_added_by ON chat_badwords(added_by)"
+            )
+            # Частичный покрывающий индекс для загрузки состояния банов при запуске:
+            # в него попадают только пользователи с предупреждениями, администраторы и забаненные
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_users_ban_state
+                ON users(user_id, spam_count, admin, is_banned)
+                WHERE spam_count > 0 OR admin = 1 OR is_banned = 1
+                """
+            )
+
+            self.create_daily_stats(cursor)
+
+    def create_daily_stats(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Создаёт дневную сводку по чатам chat_daily_stats (сообщения, спам, удалённые,
+        забаненные и число разных авторов за день) и триггеры, которые обновляют её
+        при каждой вставке в messages, в том числе пачками из WriteBehindQueue.
+        При первом создании сводка заполняется по уже накопленным сообщениям.
+        День — дата локального времени: messages.timestamp уже хранится в локальном
+        времени (datetime.now()), поэтому берётся как есть, без 'localtime'.
+
+        :param cursor: Курсор открытой транзакции записи.
+        :return: None
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chat_daily_stats'"
         )
+        backfill = cursor.fetchone() is None
 
-        self.cursor.execute(
+        cursor.execute(
             """
-            CREATE TABLE IF NOT EXISTS statistics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                chat_id INTEGER UNIQUE,
-                total_messages INTEGER DEFAULT 0,
-                deleted_messages INTEGER DEFAULT 0,
-                total_users INTEGER DEFAULT 0,
-                banned_users INTEGER DEFAULT 0,
-                last_updated TIMESTAMP,
-                FOREIGN KEY (chat_id) REFERENCES chats (chat_id)
-            )
+            CREATE TABLE IF NOT EXISTS chat_daily_stats (
+                chat_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                total INTEGER DEFAULT 0,
+                spam INTEGER DEFAULT 0,
+                deleted INTEGER DEFAULT 0,
+                banned INTEGER DEFAULT 0,
+                users INTEGER DEFAULT 0,
+                PRIMARY KEY (chat_id, day)
+            ) WITHOUT ROWID
             """
         )
-
-        self.cursor.execute(
+        # Авторы за последние дни: по ним триггер понимает, писал ли пользователь
+        # сегодня, и увеличивает users только для новых
+        cursor.execute(
             """
-            CREATE TABLE IF NOT EXISTS chat_badwords (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                chat_id INTEGER,
-                word TEXT,
-                added_by INTEGER,
-                added_at TIMESTAMP,
-                FOREIGN KEY (chat_id) REFERENCES chats (chat_id),
-                FOREIGN KEY (added_by) REFERENCES verified_users (user_id),
-                UNIQUE(chat_id, word)
-            )
+            CREATE TABLE IF NOT EXISTS chat_daily_users (
+                chat_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                PRIMARY KEY (chat_id, day, user_id)
+            ) WITHOUT ROWID
             """
         )
-
-        self.cursor.execute(
+        cursor.execute(
             """
-            CREATE TABLE IF NOT EXISTS spam_warnings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                chat_id INTEGER,
-                message_text TEXT,
-                warning_date TIMESTAMP,
-                is_confirmed BOOLEAN DEFAULT 0,
-                FOREIGN KEY (user_id) REFERENCES users (user_id),
-                FOREIGN KEY (chat_id) REFERENCES chats (chat_id)
-            )
+            CREATE TRIGGER IF NOT EXISTS messages_daily_stats
+            AFTER INSERT ON messages
+            WHEN NEW.timestamp IS NOT NULL
+            BEGIN
+                INSERT INTO chat_daily_stats (chat_id, day, total, spam)
+                VALUES (NEW.chat_id, date(NEW.timestamp), 1, NEW.is_spam = 1)
+                ON CONFLICT(chat_id, day) DO UPDATE SET
+                    total = total + 1,
+                    spam = spam + excluded.spam;
+                INSERT OR IGNORE INTO chat_daily_users (chat_id, day, user_id)
+                VALUES (NEW.chat_id, date(NEW.timestamp), NEW.user_id);
+            END
             """
         )
-
-        self.cursor.execute(
+        # INSERT OR IGNORE не вызывает триггер, если автор за этот день уже записан
+        cursor.execute(
             """
-            CREATE TABLE IF NOT EXISTS banwords_preset (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                words TEXT,
-                name TEXT
-            )
+            CREATE TRIGGER IF NOT EXISTS chat_daily_users_count
+            AFTER INSERT ON chat_daily_users
+            BEGIN
+                UPDATE chat_daily_stats SET users = users + 1
+                WHERE chat_id = NEW.chat_id AND day = NEW.day;
+            END
             """
         )
 
-        # Создание индексов для повышения производительности некоторых запросов
-        self.cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_messages_user_id ON messages(user_id)"
-        )
-        self.cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_chat_badwords_added_by ON chat_badwords(added_by)"
-        )
+        # Старые дни уже не меняются, их авторы больше не нужны (дальше они удаляются
+        # при смене дня в add_message)
+        yesterday = str(date.today() - timedelta(days=1))
+        cursor.execute("DELETE FROM chat_daily_users WHERE day < ?", (yesterday,))
 
-        self.connection.commit()
+        if backfill:
+            # Авторы заполняются раньше сводки: пока в ней нет строк, триггер
+            # chat_daily_users_count ничего не меняет
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO chat_daily_users (chat_id, day, user_id)
+                SELECT chat_id, date(timestamp) AS day, user_id
+                FROM messages
+                WHERE date(timestamp) >= ?
+                """,
+                (yesterday,),
+            )
+            cursor.execute(
+                """
+                INSERT INTO chat_daily_stats (chat_id, day, total, spam, users)
+                SELECT chat_id, date(timestamp) AS day,
+                       COUNT(*), SUM(is_spam = 1), COUNT(DISTINCT user_id)
+                FROM messages
+                WHERE timestamp IS NOT NULL
+                GROUP BY chat_id, day
+                """
+            )
+            logger.info(f"chat_daily_stats backfilled: {cursor.rowcount} days")
 
     def update_stats(
         self,
@@ -280,7 +616,7 @@ class Database:
         :param banned: Увеличить счётчик banned_users на 1 (по умолчанию False).
         :return: None
         """
-        self.cursor.execute(
+        self.write_behind.add(
             """
             INSERT INTO statistics (chat_id, total_messages, deleted_messages,
                                     total_users, banned_users, last_updated)
@@ -300,7 +636,19 @@ class Database:
                 1 if banned else 0,
             ),
         )
-        self.connection.commit()
+        # Сообщения и авторы попадают в дневную сводку триггером на messages,
+        # удалённые и забаненные — отсюда
+        if deleted or banned:
+            self.write_behind.add(
+                """
+                INSERT INTO chat_daily_stats (chat_id, day, deleted, banned)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(chat_id, day) DO UPDATE SET
+                    deleted = deleted + excluded.deleted,
+                    banned = banned + excluded.banned
+                """,
+                (chat_id, str(date.today()), 1 if deleted else 0, 1 if banned else 0),
+            )
 
     def get_most_common_word(
         self,
@@ -320,19 +668,20 @@ class Database:
                         Если False, то по убыванию (наиболее частые).
         :return: Строка, где каждая строка содержит слово и его счётчик, разделённые двоеточием.
         """
+        self.write_behind.flush()
         try:
-            self.cursor.execute("SELECT message_text FROM messages")
-            rows = self.cursor.fetchall()
-
-            # Объединяем весь текст
-            all_text = " ".join(row[0] for row in rows if row[0])
-            words = re.findall(r"\w+", all_text.lower())
-
-            # Фильтрация слов по длине
-            filtered_words = [word for word in words if min_len <= len(word) <= max_len]
-
-            # Подсчёт частот
-            word_counts: Counter[str] = Counter(filtered_words)
+            # Подсчёт частот по сообщениям: без склейки всего текста в одну строку,
+            # чтобы не держать GIL одним долгим вызовом (запрос идёт в потоке AsyncDatabase)
+            word_counts: Counter[str] = Counter()
+            with self.connections.read() as cursor:
+                cursor.execute("SELECT message_text FROM messages")
+                for (message_text,) in cursor:
+                    if message_text:
+                        word_counts.update(
+                            word
+                            for word in re.findall(r"\w+", message_text.lower())
+                            if min_len <= len(word) <= max_len
+                        )
 
             # Сортировка по частоте (если reverse=True, то сортируем по возрастанию)
             sorted_words = sorted(
@@ -356,46 +705,94 @@ class Database:
 
         :return: Список идентификаторов (user_id) администраторов (List[int]).
         """
-        self.cursor.execute("SELECT user_id FROM users WHERE admin = 1")
-        return [row[0] for row in self.cursor.fetchall()]
+        with self.connections.read() as cursor:
+            cursor.execute("SELECT user_id FROM users WHERE admin = 1")
+            return [row[0] for row in cursor.fetchall()]
 
     def get_stats(self, chat_id: int) -> Tuple[int, int]:
         """
-        Получает статистику по конкретному чату: total_messages и deleted_messages.
+        Получает статистику по конкретному чату: всего сообщений (по дневной сводке
+        chat_daily_stats) и deleted_messages.
 
         :param chat_id: Идентификатор чата (int).
         :return: Кортеж (total_messages, deleted_messages). Если нет записей, возвращается (0, 0).
         """
-        self.cursor.execute(
-            """
-            SELECT total_messages, deleted_messages
-            FROM statistics
-            WHERE chat_id = ?
-            """,
-            (chat_id,),
-        )
-        return self.cursor.fetchone() or (0, 0)
+        self.write_behind.flush()
+        with self.connections.read() as cursor:
+            cursor.execute(
+                """
+                SELECT
+                    (SELECT COALESCE(SUM(total), 0)
+                     FROM chat_daily_stats WHERE chat_id = ?),
+                    (SELECT COALESCE(deleted_messages, 0)
+                     FROM statistics WHERE chat_id = ?)
+                """,
+                (chat_id, chat_id),
+            )
+            total, deleted = cursor.fetchone()
+            return total, deleted or 0
+
+    def get_daily_stats(
+        self, chat_id: int, days: Optional[int] = None
+    ) -> List[Tuple[str, int, int, int, int, int]]:
+        """
+        Получает дневную сводку чата из chat_daily_stats.
+
+        :param chat_id: Идентификатор чата (int).
+        :param days: Сколько последних дней вернуть (None — все).
+        :return: Список кортежей (день YYYY-MM-DD, всего сообщений, спам, удалено,
+                 забанено, разных авторов) в порядке возрастания дня.
+        """
+        self.write_behind.flush()
+        # Без ограничения берём все дни: любая дата больше пустой строки
+        since = "" if days is None else str(date.today() - timedelta(days=days - 1))
+        with self.connections.read() as cursor:
+            cursor.execute(
+                """
+                SELECT day, total, spam, deleted, banned, users
+                FROM chat_daily_stats
+                WHERE chat_id = ? AND day >= ?
+                ORDER BY day
+                """,
+                (chat_id, since),
+            )
+            return cursor.fetchall()
 
     # ===========================
     # Работа с чатом
     # ===========================
+    def load_known_chats(self) -> None:
+        """
+        Загружает в память активные чаты и их названия. Вызывается один раз при запуске,
+        дальше набор поддерживается методами add_chat и remove_chat.
+
+        :return: None
+        """
+        with self.connections.read() as cursor:
+            cursor.execute("SELECT chat_id, title FROM chats WHERE is_active = 1")
+            self.known_chats = dict(cursor.fetchall())
+
     def add_chat(self, chat_id: int, title: str) -> None:
         """
-        Добавляет новый чат в таблицу chats, если его нет.
-        При этом сохраняется захешированный chat_id в hashed_chat_id.
+        Добавляет чат в таблицу chats или обновляет его название и снова делает активным.
+        Известный чат с тем же названием в базу не пишется; остальные записи откладываются
+        и попадают в базу пачкой.
 
         :param chat_id: Идентификатор чата (int).
         :param title: Название чата (str).
         :return: None
         """
-        self.cursor.execute(
+        if chat_id in self.known_chats and self.known_chats[chat_id] == title:
+            return
+        self.known_chats[chat_id] = title
+        self.write_behind.add(
             """
-            INSERT OR IGNORE INTO chats (chat_id, title, join_date)
-            VALUES (?, ?, ?, ?)
+            INSERT INTO chats (chat_id, title, join_date)
+            VALUES (?, ?, ?)
+            ON CONFLICT(chat_id) DO UPDATE SET title = excluded.title, is_active = 1
             """,
             (chat_id, title, datetime.now()),
         )
-        self.connection.commit()
 
     def remove_chat(self, chat_id: int) -> None:
         """
@@ -404,10 +801,109 @@ class Database:
         :param chat_id: Идентификатор чата (int).
         :return: None
         """
-        self.cursor.execute(
-            "UPDATE chats SET is_active = 0 WHERE chat_id = ?", (chat_id,)
-        )
-        self.connection.commit()
+        # Отложенный add_chat не должен снова сделать чат активным
+        self.write_behind.flush()
+        with self.connections.write() as cursor:
+            cursor.execute(
+                "UPDATE chats SET is_active = 0 WHERE chat_id = ?", (chat_id,)
+            )
+        self.known_chats.pop(chat_id, None)
+
+    def load_chat_settings(self) -> None:
+        """
+        Загружает настройки всех чатов в память. Если рядом лежит файл autos.txt
+        от старых версий бота, чаты из него получают autoclean = True, а файл
+        переименовывается в autos.txt.migrated.
+
+        :return: None
+        """
+        with self.connections.read() as cursor:
+            cursor.execute(
+                "SELECT chat_id, settings FROM chats WHERE settings IS NOT NULL"
+            )
+            rows = cursor.fetchall()
+        self.chat_settings = {
+            chat_id: ChatSettings.from_json(raw) for chat_id, raw in rows
+        }
+
+        if not os.path.exists(AUTOS_FILE):
+            return
+        with open(AUTOS_FILE, "r", encoding="utf-8") as f:
+            chat_ids = [
+                int(line) for line in f.read().split() if line.lstrip("-").isdigit()
+            ]
+        for chat_id in chat_ids:
+            self.update_chat_settings(chat_id, autoclean=True)
+        os.replace(AUTOS_FILE, AUTOS_FILE + ".migrated")
+        logger.info(f"Migrated {len(chat_ids)} chats from {AUTOS_FILE}")
+
+    def get_chat_settings(self, chat_id: int) -> ChatSettings:
+        """
+        Возвращает настройки чата из памяти (без обращения к базе).
+
+        :param chat_id: Идентификатор чата (int).
+        :return: Объект ChatSettings (настройки по умолчанию, если чат их не менял).
+        """
+        return self.chat_settings.get(chat_id, DEFAULT_CHAT_SETTINGS)
+
+    def get_autoclean_chats(self) -> List[int]:
+        """
+        Получает список чатов с включённой автомодерацией (из памяти).
+
+        :return: Список идентификаторов чатов (List[int]).
+        """
+        return [
+            chat_id
+            for chat_id, settings in self.chat_settings.items()
+            if settings.autoclean
+        ]
+
+    def update_chat_settings(self, chat_id: int, **changes) -> Optional[ChatSettings]:
+        """
+        Изменяет настройки чата и сразу записывает их в базу. Чтение, изменение и запись
+        выполняются под блокировкой записи, поэтому одновременные изменения не теряются.
+
+        :param chat_id: Идентификатор чата (int).
+        :param changes: Новые значения полей ChatSettings.
+        :return: Настройки до изменения или None при ошибке записи.
+        """
+        with self.connections.lock:
+            previous = self.get_chat_settings(chat_id)
+            if self._write_chat_settings(chat_id, replace(previous, **changes)):
+                return previous
+            return None
+
+    def toggle_chat_setting(self, chat_id: int, name: str) -> Optional[ChatSettings]:
+        """
+        Инвертирует логическую настройку чата и сразу записывает её в базу.
+
+        :param chat_id: Идентификатор чата (int).
+        :param name: Имя поля ChatSettings (например, "autoclean").
+        :return: Настройки до изменения или None при ошибке записи.
+        """
+        with self.connections.lock:
+            previous = self.get_chat_settings(chat_id)
+            toggled = replace(previous, **{name: not getattr(previous, name)})
+            if self._write_chat_settings(chat_id, toggled):
+                return previous
+            return None
+
+    def _write_chat_settings(self, chat_id: int, settings: ChatSettings) -> bool:
+        try:
+            with self.connections.write() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO chats (chat_id, join_date, settings)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(chat_id) DO UPDATE SET settings = excluded.settings
+                    """,
+                    (chat_id, datetime.now(), settings.to_json()),
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error saving chat settings: {e}")
+            return False
+        self.chat_settings[chat_id] = settings
+        return True
 
     def get_all_chats(self) -> List[Tuple[int, str]]:
         """
@@ -415,8 +911,9 @@ class Database:
 
         :return: Список кортежей (chat_id, title).
         """
-        self.cursor.execute("SELECT chat_id, title FROM chats WHERE is_active = 1")
-        return self.cursor.fetchall()
+        with self.connections.read() as cursor:
+            cursor.execute("SELECT chat_id, title FROM chats WHERE is_active = 1")
+            return cursor.fetchall()
 
     # ===========================
     # Работа с сообщениями
@@ -430,7 +927,7 @@ class Database:
         link: Optional[str] = None,
     ) -> None:
         """
-        Добавляет новое сообщение в таблицу messages.
+        Добавляет новое сообщение в таблицу messages (запись откладывается).
 
         :param chat_id: Идентификатор чата (int).
         :param user_id: Идентификатор пользователя (int).
@@ -439,14 +936,22 @@ class Database:
         :param link: Ссылка (URL) при необходимости (например, если в сообщении обнаружена ссылка).
         :return: None
         """
-        self.cursor.execute(
+        now = datetime.now()
+        self.write_behind.add(
             """
             INSERT INTO messages (chat_id, user_id, message_text, timestamp, is_spam, link)
             VALUES (?, ?, ?, ?, ?, ?)
             """,
-            (chat_id, user_id, message_text, datetime.now(), is_spam, link),
+            (chat_id, user_id, message_text, now, is_spam, link),
         )
-        self.connection.commit()
+        # С наступлением нового дня авторы позавчерашнего дня больше не нужны
+        today = now.date()
+        if today != self.daily_users_day:
+            self.daily_users_day = today
+            self.write_behind.add(
+                "DELETE FROM chat_daily_users WHERE day < ?",
+                (str(today - timedelta(days=1)),),
+            )
 
     # ===========================
     # Работа с плохими словами
@@ -455,6 +960,8 @@ class Database:
         """
         Добавляет "плохое слово" (запрещённое) в таблицу chat_badwords.
         При необходимости экранирует строку регулярного выражения, если оно невалидно.
+        Регулярки с конструкциями, опасными для времени выполнения (см.
+        find_unsafe_construct), не сохраняются.
 
         :param chat_id: Идентификатор чата (int).
         :param word: Слово или паттерн, который нужно запретить (str).
@@ -470,36 +977,101 @@ class Database:
                 return False
 
         # Приводим слово к нижнему регистру и убираем акценты (unidecode)
-        word = unidecode.unidecode(word.lower())
+        word = transliterate(word.lower())
         # Если это невалидный паттерн, экранируем
         if not is_regex_pattern(word):
             word = re.escape(word)
 
+        reason = find_unsafe_construct(word)
+        if reason:
+            logger.warning(f"Rejected unsafe pattern {word!r}: {reason}")
+            return False
+
         try:
-            self.cursor.execute(
-                """
-                INSERT OR IGNORE INTO chat_badwords (chat_id, word, added_by, added_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (chat_id, word, added_by, datetime.now()),
-            )
-            self.connection.commit()
+            with self.connections.write() as cursor:
+                cursor.execute(
+                    """
+                    INSERT OR IGNORE INTO chat_badwords (chat_id, word, added_by, added_at)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (chat_id, word, added_by, datetime.now()),
+                )
+            self.badwords_versions[chat_id] += 1
             return True
         except sqlite3.Error as e:
             logger.error(f"Error adding bad word: {e}")
             return False
 
-    def get_chat_badwords(self, chat_id: int) -> List[str]:
+    def delete_chat_badword(self, chat_id: int, word: str) -> bool:
+        """
+        Удаляет "плохое слово" из списка запрещённых слов чата.
+
+        :param chat_id: Идентификатор чата (int).
+        :param word: Слово или паттерн, который нужно удалить (str).
+        :return: True, если удаление прошло успешно, иначе False.
+        """
+        try:
+            with self.connections.write() as cursor:
+                cursor.execute(
+                    "DELETE FROM chat_badwords WHERE chat_id = ? AND word = ?",
+                    (chat_id, word),
+                )
+            self.badwords_versions[chat_id] += 1
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error deleting bad word: {e}")
+            return False
+
+    def get_badwords_version(self, chat_id: int) -> int:
+        """
+        Возвращает текущую версию набора запрещённых слов чата.
+        Версия увеличивается при каждом добавлении или удалении слова.
+
+        :param chat_id: Идентификатор чата (int).
+        :return: Номер версии (int).
+        """
+        return self.badwords_versions.get(chat_id, 0)
+
+    def quarantine_chat_badword(self, chat_id: int, word: str) -> bool:
+        """
+        Отправляет паттерн чата в карантин: он остаётся в списке, но больше не применяется.
+
+        :param chat_id: Идентификатор чата (int).
+        :param word: Паттерн в том виде, в каком его вернул get_chat_badwords (str).
+        :return: True, если паттерн найден и помечен, иначе False.
+        """
+        try:
+            with self.connections.write() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE chat_badwords SET quarantined = 1
+                    WHERE chat_id = ? AND REPLACE(LOWER(word), ' ', '') = ?
+                    """,
+                    (chat_id, word),
+                )
+                updated = cursor.rowcount > 0
+            self.badwords_versions[chat_id] += 1
+            return updated
+        except sqlite3.Error as e:
+            logger.error(f"Error quarantining bad word: {e}")
+            return False
+
+    def get_chat_badwords(
+        self, chat_id: int, include_quarantined: bool = False
+    ) -> List[str]:
         """
         Возвращает список всех запрещённых слов (паттернов) для указанного чата.
 
         :param chat_id: Идентификатор чата (int).
+        :param include_quarantined: Включать ли паттерны, отправленные в карантин.
         :return: Список строк (List[str]) — слова/паттерны в нижнем регистре.
         """
-        self.cursor.execute(
-            "SELECT word FROM chat_badwords WHERE chat_id = ?", (chat_id,)
-        )
-        return [row[0].lower().replace(" ", "") for row in self.cursor.fetchall()]
+        query = "SELECT word FROM chat_badwords WHERE chat_id = ?"
+        if not include_quarantined:
+            query += " AND quarantined = 0"
+        with self.connections.read() as cursor:
+            cursor.execute(query, (chat_id,))
+            return [row[0].lower().replace(" ", "") for row in cursor.fetchall()]
 
     # ===========================
     # Работа с пользователями
@@ -511,8 +1083,9 @@ class Database:
         :param user_id: Идентификатор пользователя (int).
         :return: Кортеж с данными пользователя или None, если пользователь не найден.
         """
-        self.cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-        return self.cursor.fetchone()
+        with self.connections.read() as cursor:
+            cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
+            return cursor.fetchone()
 
     def get_user_messages_count(self, user_id: int) -> int:
         """
@@ -521,10 +1094,12 @@ class Database:
         :param user_id: Идентификатор пользователя (int).
         :return: Количество сообщений (int).
         """
-        self.cursor.execute(
-            "SELECT COUNT(*) FROM messages WHERE user_id = ?", (user_id,)
-        )
-        return self.cursor.fetchone()[0]
+        self.write_behind.flush()
+        with self.connections.read() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM messages WHERE user_id = ?", (user_id,)
+            )
+            return cursor.fetchone()[0]
 
     def add_verified_user(self, user_id: int, user_data: dict) -> bool:
         """
@@ -543,23 +1118,23 @@ class Database:
         :return: True при успешном добавлении/обновлении, False при ошибке.
         """
         try:
-            self.cursor.execute(
-                """
-                INSERT OR REPLACE INTO verified_users
-                (user_id, first_name, username, verified_at,
-                 first_message_date, messages_count, chats_count)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?)
-                """,
-                (
-                    user_id,
-                    user_data.get("first_name", ""),
-                    user_data.get("username", ""),
-                    user_data.get("first_msg_date"),
-                    user_data.get("messages_count", 0),
-                    user_data.get("chats_count", 0),
-                ),
-            )
-            self.connection.commit()
+            with self.connections.write() as cursor:
+                cursor.execute(
+                    """
+                    INSERT OR REPLACE INTO verified_users
+                    (user_id, first_name, username, verified_at,
+                     first_message_date, messages_count, chats_count)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?)
+                    """,
+                    (
+                        user_id,
+                        user_data.get("first_name", ""),
+                        user_data.get("username", ""),
+                        user_data.get("first_msg_date"),
+                        user_data.get("messages_count", 0),
+                        user_data.get("chats_count", 0),
+                    ),
+                )
             return True
         except sqlite3.Error as e:
             logger.error(f"Error adding verified user: {e}")
@@ -572,10 +1147,11 @@ class Database:
         :param user_id: Идентификатор пользователя (int).
         :return: True, если пользователь найден, иначе False.
         """
-        self.cursor.execute(
-            "SELECT user_id FROM verified_users WHERE user_id = ?", (user_id,)
-        )
-        return bool(self.cursor.fetchone())
+        with self.connections.read() as cursor:
+            cursor.execute(
+                "SELECT user_id FROM verified_users WHERE user_id = ?", (user_id,)
+            )
+            return bool(cursor.fetchone())
 
     def add_user(
         self,
@@ -584,29 +1160,34 @@ class Database:
         username: Optional[str] = None,
     ) -> bool:
         """
-        Добавляет или обновляет запись пользователя в таблице users.
+        Добавляет или обновляет запись пользователя в таблице users (запись откладывается,
+        ошибки записи логируются при сбросе очереди). Если имя и username совпадают
+        с последними записанными, в базу ничего не пишется.
 
         :param user_id: Идентификатор пользователя (int).
         :param first_name: Имя пользователя (str) или None.
         :param username: Username пользователя (str) или None.
-        :return: True, если операция прошла успешно, иначе False.
+        :return: True, если запись поставлена в очередь или не требуется.
         """
-        try:
-            self.cursor.execute(
-                """
-                INSERT INTO users (user_id, first_name, username, join_date)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(user_id) DO UPDATE SET
-                    first_name = excluded.first_name,
-                    username = excluded.username
-                """,
-                (user_id, first_name, username),
-            )
-            self.connection.commit()
+        profile = (first_name, username)
+        if self.user_profiles.get(user_id) == profile:
+            self.user_profiles.move_to_end(user_id)
             return True
-        except sqlite3.Error as e:
-            logger.error(f"Error adding user: {e}")
-            return False
+        self.user_profiles[user_id] = profile
+        self.user_profiles.move_to_end(user_id)
+        if len(self.user_profiles) > self.USER_CACHE_SIZE:
+            self.user_profiles.popitem(last=False)
+        self.write_behind.add(
+            """
+            INSERT INTO users (user_id, first_name, username, join_date)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(user_id) DO UPDATE SET
+                first_name = excluded.first_name,
+                username = excluded.username
+            """,
+            (user_id, first_name, username),
+        )
+        return True
 
     # ===========================
     # Предупреждения о спаме и баны
@@ -615,35 +1196,66 @@ class Database:
         """
         Добавляет запись о предупреждении спама (spam_warnings) и инкрементирует счётчик
         spam_count в таблице users. Если счётчик достигает 3, устанавливается ban_pending = 1.
+        Запись откладывается, ошибки логируются при сбросе очереди.
 
         :param user_id: Идентификатор пользователя (int).
         :param chat_id: Идентификатор чата (int).
         :param message_text: Текст сообщения, вызвавшего предупреждение (str).
-        :return: True, если успешно добавлено предупреждение, False при ошибке.
+        :return: True, если запись поставлена в очередь.
         """
-        try:
-            self.cursor.execute(
+        self.write_behind.add(
+            """
+            INSERT INTO spam_warnings (user_id, chat_id, message_text, warning_date)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            """,
+            (user_id, chat_id, message_text),
+        )
+        # Увеличиваем spam_count. Через upsert, а не UPDATE: в пачке запрос может
+        # выполниться раньше, чем добавление самого пользователя
+        self.write_behind.add(
+            """
+            INSERT INTO users (user_id, join_date, spam_count)
+            VALUES (?, CURRENT_TIMESTAMP, 1)
+            ON CONFLICT(user_id) DO UPDATE SET
+                spam_count = spam_count + 1,
+                ban_pending = CASE WHEN spam_count + 1 >= 3 THEN 1 ELSE 0 END
+            """,
+            (user_id,),
+        )
+        count = self.spam_counts.get(user_id, 0) + 1
+        self.spam_counts[user_id] = count
+        if count >= 3 and user_id not in self.ban_exempt:
+            self.pending_bans.add(user_id)
+        return True
+
+    def load_ban_state(self) -> None:
+        """
+        Загружает из таблицы users счётчики предупреждений, администраторов, забаненных
+        и пользователей, ожидающих бана (spam_count >= 3, не администратор и ещё не забанен).
+        Вызывается один раз при запуске, дальше состояние поддерживается методами
+        add_spam_warning, confirm_ban и reject_ban.
+
+        :return: None
+        """
+        self.write_behind.flush()
+        with self.connections.read() as cursor:
+            cursor.execute(
                 """
-                INSERT INTO spam_warnings (user_id, chat_id, message_text, warning_date)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                """,
-                (user_id, chat_id, message_text),
-            )
-            # Увеличиваем spam_count
-            self.cursor.execute(
+                SELECT user_id, spam_count, admin, is_banned
+                FROM users
+                WHERE spam_count > 0 OR admin = 1 OR is_banned = 1
                 """
-                UPDATE users
-                SET spam_count = spam_count + 1,
-                    ban_pending = CASE WHEN spam_count + 1 >= 3 THEN 1 ELSE 0 END
-                WHERE user_id = ?
-                """,
-                (user_id,),
             )
-            self.connection.commit()
-            return True
-        except sqlite3.Error as e:
-            logger.error(f"Error adding spam warning: {e}")
-            return False
+            rows = cursor.fetchall()
+        self.spam_counts = {user_id: count for user_id, count, _, _ in rows if count}
+        self.ban_exempt = {
+            user_id for user_id, _, admin, banned in rows if admin or banned
+        }
+        self.pending_bans = {
+            user_id
+            for user_id, count, admin, banned in rows
+            if count >= 3 and not (admin or banned)
+        }
 
     def get_pending_bans(self) -> List[int]:
         """
@@ -651,15 +1263,16 @@ class Database:
 
         :return: Список идентификаторов пользователей (List[int]).
         """
-        self.cursor.execute(
-            """
-            SELECT user_id
-            FROM users
-            WHERE spam_count >= 3 AND admin = 0
-            """
-        )
-        result = [user[0] for user in self.cursor.fetchall()]
-        return result
+        return list(self.pending_bans)
+
+    def is_ban_pending(self, user_id: int) -> bool:
+        """
+        Проверяет, помечен ли пользователь на бан (без обращения к базе).
+
+        :param user_id: Идентификатор пользователя (int).
+        :return: True, если пользователь ожидает бана, иначе False.
+        """
+        return user_id in self.pending_bans
 
     def confirm_ban(self, user_id: int) -> bool:
         """
@@ -668,16 +1281,20 @@ class Database:
         :param user_id: Идентификатор пользователя (int).
         :return: True, если обновление прошло успешно, иначе False.
         """
+        # Отложенные предупреждения не должны снова пометить пользователя после обновления
+        self.write_behind.flush()
         try:
-            self.cursor.execute(
-                """
-                UPDATE users
-                SET is_banned = 1, ban_pending = 0
-                WHERE user_id = ?
-                """,
-                (user_id,),
-            )
-            self.connection.commit()
+            with self.connections.write() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE users
+                    SET is_banned = 1, ban_pending = 0
+                    WHERE user_id = ?
+                    """,
+                    (user_id,),
+                )
+            self.ban_exempt.add(user_id)
+            self.pending_bans.discard(user_id)
             return True
         except sqlite3.Error as e:
             logger.error(f"Error confirming ban: {e}")
@@ -690,16 +1307,20 @@ class Database:
         :param user_id: Идентификатор пользователя (int).
         :return: True, если обновление прошло успешно, иначе False.
         """
+        # Отложенные предупреждения не должны снова пометить пользователя после обновления
+        self.write_behind.flush()
         try:
-            self.cursor.execute(
-                """
-                UPDATE users
-                SET spam_count = 0, ban_pending = 0
-                WHERE user_id = ?
-                """,
-                (user_id,),
-            )
-            self.connection.commit()
+            with self.connections.write() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE users
+                    SET spam_count = 0, ban_pending = 0
+                    WHERE user_id = ?
+                    """,
+                    (user_id,),
+                )
+            self.spam_counts.pop(user_id, None)
+            self.pending_bans.discard(user_id)
             return True
         except sqlite3.Error as e:
             logger.error(f"Error rejecting ban: {e}")
@@ -707,17 +1328,19 @@ class Database:
 
     def search(self, text: str | Optional[List[str]]) -> str:
 
+        self.write_behind.flush()
         if isinstance(text, list):
             text = " ".join(text)
-        self.cursor.execute(
-            """SELECT user_id, message_text
-                FROM messages
-                WHERE lower(message_text)
-                LIKE '% ' || lower(?) || ' %'
-                LIMIT 10;""",
-            (text,),
-        )
-        return "\n".join(map(str, self.cursor.fetchall()))
+        with self.connections.read() as cursor:
+            cursor.execute(
+                """SELECT user_id, message_text
+                    FROM messages
+                    WHERE lower(message_text)
+                    LIKE '% ' || lower(?) || ' %'
+                    LIMIT 10;""",
+                (text,),
+            )
+            return "\n".join(map(str, cursor.fetchall()))
 
     def is_user_banned(self, user_id: int) -> bool:
         """
@@ -726,10 +1349,44 @@ class Database:
         :param user_id: Идентификатор пользователя (int).
         :return: True, если пользователь забанен, иначе False.
         """
-        self.cursor.execute("SELECT is_banned FROM users WHERE user_id = ?", (user_id,))
-        result = self.cursor.fetchone()
+        with self.connections.read() as cursor:
+            cursor.execute("SELECT is_banned FROM users WHERE user_id = ?", (user_id,))
+            result = cursor.fetchone()
         return bool(result and result[0])
 
+    def get_banned_users(self, user_ids: List[int]) -> Set[int]:
+        """
+        Выбирает из списка пользователей тех, кто забанен (is_banned = 1), одним запросом
+        на каждые MAX_VARIABLES идентификаторов.
+
+        :param user_ids: Список идентификаторов пользователей.
+        :return: Множество идентификаторов забаненных пользователей.
+        """
+        return self._select_ids(
+            "SELECT user_id FROM users WHERE is_banned = 1 AND user_id IN ({})",
+            user_ids,
+        )
+
+    def get_verified_users(self, user_ids: List[int]) -> Set[int]:
+        """
+        Выбирает из списка пользователей тех, кто есть в таблице verified_users.
+
+        :param user_ids: Список идентификаторов пользователей.
+        :return: Множество идентификаторов проверенных пользователей.
+        """
+        return self._select_ids(
+            "SELECT user_id FROM verified_users WHERE user_id IN ({})", user_ids
+        )
+
+    def _select_ids(self, query: str, ids: List[int]) -> Set[int]:
+        found = set()
+        with self.connections.read() as cursor:
+            for start in range(0, len(ids), self.MAX_VARIABLES):
+                chunk = ids[start : start + self.MAX_VARIABLES]
+                cursor.execute(query.format(",".join("?" * len(chunk))), chunk)
+                found.update(row[0] for row in cursor.fetchall())
+        return found
+
     def find_users_who_wrote_words(
         self, words: Union[str, List[str]]
     ) -> List[Tuple[int, str, Optional[str], str]]:
@@ -741,6 +1398,7 @@ class Database:
         :param words: Слово (str) или список слов (List[str]) для поиска.
         :return: Список кортежей (user_id, first_name, username, message_text).
         """
+        self.write_behind.flush()
         if isinstance(words, str):
             words_list = [words]
         else:
@@ -764,8 +1422,9 @@ class Database:
         """
 
         try:
-            self.cursor.execute(query, placeholders)
-            return self.cursor.fetchall()
+            with self.connections.read() as cursor:
+                cursor.execute(query, placeholders)
+                return cursor.fetchall()
         except sqlite3.Error as e:
             logger.error(f"Ошибка при поиске пользователей по словам: {e}")
             return []
@@ -780,58 +1439,212 @@ class Database:
     ) -> Union[str, List[str], bool]:
         """
         Создаёт графики для одного или нескольких чатов и сохраняет их в директории output_dir.
-        Использует многопоточность для одновременной генерации нескольких графиков.
+        Графики рисуются в пуле процессов (см. GraphRenderer); если данные чата
+        не изменились с прошлого запроса, возвращается уже готовый файл.
 
         :param chat_id: Целое число (один чат) или список идентификаторов чатов.
         :param output_dir: Путь к директории, куда сохраняются графики (str).
         :return: Строка с путём к графику (если чатов один), список строк (если чатов несколько),
                  или False, если данные отсутствуют.
         """
+        self.write_behind.flush()
         tasks = []
         if isinstance(chat_id, int):
             chat_ids = [chat_id]
         else:
             chat_ids = chat_id  # type: ignore
 
+        # Количество сообщений и спама по дням берётся из дневной сводки
+        # chat_daily_stats одним запросом на все чаты (пачками по MAX_VARIABLES)
+        counts: Dict[int, List[Tuple[str, int, int]]] = defaultdict(list)
+        with self.connections.read() as cursor:
+            for start in range(0, len(chat_ids), self.MAX_VARIABLES):
+                chunk = chat_ids[start : start + self.MAX_VARIABLES]
+                cursor.execute(
+                    f"""
+                    SELECT chat_id, day, total, spam
+                    FROM chat_daily_stats
+                    WHERE chat_id IN ({",".join("?" * len(chunk))}) AND total > 0
+                    ORDER BY chat_id, day
+                    """,
+                    chunk,
+                )
+                for c_id, day, total, spam in cursor.fetchall():
+                    counts[c_id].append((day, total, spam))
+
         # Формируем задачи для каждого чата
         for c_id in chat_ids:
-            # Получение всех сообщений для чата
-            self.cursor.execute(
-                "SELECT datetime(timestamp, 'localtime') FROM messages WHERE chat_id = ? ORDER BY timestamp",
-                (c_id,),
-            )
-            raw_dates = self.cursor.fetchall()
-
-            # Получение всех удалённых (спам) сообщений для чата
-            self.cursor.execute(
-                """
-                SELECT datetime(timestamp, 'localtime')
-                FROM messages
-                WHERE chat_id = ? AND is_spam = 1
-                ORDER BY timestamp
-                """,
-                (c_id,),
-            )
-            raw_deleted_dates = self.cursor.fetchall()
-
-            if raw_dates:
-                tasks.append((c_id, raw_dates, raw_deleted_dates, output_dir))
+            daily_counts = counts.get(c_id)
+            if daily_counts:
+                tasks.append((c_id, daily_counts, output_dir))
             else:
                 logger.info(f"No data found for chat_id {c_id}.")
 
+        # Отрисовка идёт в пуле процессов; неизменившиеся графики берутся из кэша
+        futures = []
+        for task in tasks:
+            try:
+                futures.append(graph_renderer.render(*task))
+            except Exception as e:
+                logger.info(f"Error during graph generation: {e}")
         results = []
-        with ThreadPoolExecutor(max_workers=32) as executor:
-            futures = [executor.submit(generate_plot, task) for task in tasks]
-            for future in as_completed(futures):
-                try:
-                    results.append(future.result())
-                except Exception as e:
-                    logger.info(f"Error during graph generation: {e}")
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.info(f"Error during graph generation: {e}")
 
         if not results:
             return False
         return results[0] if len(results) == 1 else results
 
+    def get_dashboard_stats(
+        self, days: int = 30, limit: int = 10
+    ) -> List[Tuple[int, Optional[str], str, int, int]]:
+        """
+        Получает дневную статистику самых активных чатов за последние days дней
+        одним сгруппированным запросом к chat_daily_stats.
+
+        :param days: Длина периода в днях (int).
+        :param limit: Сколько самых активных чатов вернуть (int).
+        :return: Список кортежей (chat_id, название, день YYYY-MM-DD, всего сообщений,
+                 спам): чаты в порядке убывания числа сообщений за период, дни по возрастанию.
+        """
+        self.write_behind.flush()
+        since = str(date.today() - timedelta(days=days - 1))
+        with self.connections.read() as cursor:
+            cursor.execute(
+                """
+                WITH top AS (
+                    SELECT s.chat_id, c.title, SUM(s.total) AS period_total
+                    FROM chat_daily_stats s
+                    JOIN chats c ON c.chat_id = s.chat_id
+                    WHERE c.is_active = 1 AND s.day >= ?
+                    GROUP BY s.chat_id
+                    HAVING period_total > 0
+                    ORDER BY period_total DESC
+                    LIMIT ?
+                )
+                SELECT top.chat_id, top.title, s.day, s.total, s.spam
+                FROM top
+                JOIN chat_daily_stats s ON s.chat_id = top.chat_id AND s.day >= ?
+                ORDER BY top.period_total DESC, top.chat_id, s.day
+                """,
+                (since, limit, since),
+            )
+            return cursor.fetchall()
+
+    def get_dashboard_graph(
+        self, days: int = 30, limit: int = 10, output_dir: str = "src/stats/"
+    ) -> Union[str, bool]:
+        """
+        Создаёт обзорный график по самым активным чатам: сообщения и спам за период
+        и тепловую карту доли спама по дням. Рисуется в пуле процессов (см. GraphRenderer),
+        при неизменившихся данных возвращается уже готовый файл.
+
+        :param days: Длина периода в днях (int).
+        :param limit: Сколько самых активных чатов показать (int).
+        :param output_dir: Путь к директории, куда сохраняются графики (str).
+        :return: Путь к графику (str) или False, если за период нет данных.
+        """
+        rows = self.get_dashboard_stats(days, limit)
+        if not rows:
+            return False
+        first_day = date.today() - timedelta(days=days - 1)
+        period = [str(first_day + timedelta(days=i)) for i in range(days)]
+        try:
+            return graph_renderer.render_dashboard(rows, period, output_dir).result()
+        except Exception as e:
+            logger.info(f"Error during dashboard generation: {e}")
+            return False
+
+
+class AsyncDatabase:
+    """
+    Асинхронный фасад над Database: каждый метод Database доступен как корутина
+    и выполняется в потоках базы данных, не блокируя цикл событий. Чтение идёт
+    в пуле потоков со своими соединениями только для чтения, запись — в одном
+    потоке записи. Методы, которые только ставят запись в очередь WriteBehindQueue
+    или читают данные из памяти, выполняются сразу в потоке цикла событий.
+    """
+
+    # Префиксы имён методов, которые только читают из базы
+    READ_PREFIXES = ("get_", "is_", "find_", "search")
+
+    # Методы, не обращающиеся к SQLite напрямую
+    IN_MEMORY_METHODS = frozenset(
+        {
+            "add_user",
+            "add_message",
+            "add_chat",
+            "add_spam_warning",
+            "update_stats",
+            "get_badwords_version",
+            "get_pending_bans",
+            "is_ban_pending",
+            "get_chat_settings",
+            "get_autoclean_chats",
+        }
+    )
+
+    def __init__(self, database: Database, readers: int = 4) -> None:
+        """
+        :param database: Синхронный объект Database.
+        :param readers: Количество потоков чтения.
+        """
+        self.database = database
+        # Запись всё равно сериализуется SQLite, поэтому для неё хватает одного потока
+        self.writer = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="database-writer",
+            initializer=database.write_behind.bind_writer,
+        )
+        self.readers = ThreadPoolExecutor(
+            max_workers=readers, thread_name_prefix="database-reader"
+        )
+        database.write_behind.executor = self.writer
+
+    def __getattr__(self, name: str) -> Callable:
+        method = getattr(self.database, name)
+        if not callable(method):
+            raise AttributeError(f"{name} is not a Database method")
+
+        if name in self.IN_MEMORY_METHODS:
+
+            async def call(*args, **kwargs):
+                return method(*args, **kwargs)
+
+        else:
+
+            reads = name.startswith(self.READ_PREFIXES)
+            executor = self.readers if reads else self.writer
+
+            async def call(*args, **kwargs):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    executor, partial(method, *args, **kwargs)
+                )
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        # Обёртка создаётся один раз на метод
+        setattr(self, name, call)
+        return call
+
+    def close(self) -> None:
+        """
+        Дожидается выполнения поставленных запросов, записывает отложенные изменения
+        и закрывает соединения.
+
+        :return: None
+        """
+        self.readers.shutdown(wait=True)
+        self.writer.shutdown(wait=True)
+        # Дальше отложенные записи выполняются в текущем потоке
+        self.database.write_behind.executor = None
+        self.database.close()
+
 
 # Инициализация базы
 db = Database("antispam.db")
+adb = AsyncDatabase(db)
@@ -1,12 +1,8 @@
-import pyrogram
-import pyrogram.errors
 from pyrogram import filters
 from pyrogram.types import Message, CallbackQuery
 from pyrogram.client import Client
-from src.database import db
+from src.admins import GLOBAL, admin_cache
 from src.functions.functions import is_user_message_admin
-from src.utils.logger_config import logger
-from pyrogram.enums import ChatMemberStatus
 
 
 class IsAdmin(filters.Filter):
@@ -20,27 +16,25 @@ class IsAdmin(filters.Filter):
             return await is_user_message_admin(message)
         elif isinstance(message, CallbackQuery):
             callback_query = message
-            if callback_query.from_user.id in db.get_admins():
-                return True
-            try:
-                chat_id = callback_query.message.chat.id
-                user_id = callback_query.from_user.id
-                user = await client.get_chat_member(chat_id, user_id)
-                result = bool(
-                    user.status
-                    in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]
+            if not await admin_cache.is_admin(
+                client, callback_query.message.chat.id, callback_query.from_user.id
+            ):
+                await callback_query.answer(
+                    "Вы не являетесь администратором или основателем!",
+                    show_alert=True,
                 )
-                logger.info(f"{user.status}")
-
-                if not result:
-                    await callback_query.answer(
-                        "Вы не являетесь администратором или основателем!",
-                        show_alert=True,
-                    )
-                    return False
-                return True
-            except pyrogram.errors.UserNotParticipant:
                 return False
+            return True
 
 
 is_admin = IsAdmin().is_admin
+
+
+async def _is_global_admin(_, client: Client, message: Message) -> bool:
+    # Глобальные администраторы бота (users.admin = 1), без администраторов чатов
+    return message.from_user is not None and message.from_user.id in (
+        await admin_cache.get(client, GLOBAL) or ()
+    )
+
+
+is_global_admin = filters.create(_is_global_admin, "is_global_admin")
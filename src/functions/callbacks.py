@@ -18,7 +18,9 @@ from src.constants import (
     waiting_for_payment,
     waiting_for_word,
 )
-from src.database import db
+from src.admins import admin_cache
+from src.database import adb
+from src.join_waves import join_waves
 from src.markups.markups import (
     get_filter_settings_button,
     get_main_menu,
@@ -54,7 +56,7 @@ async def remove_badword_handler(client: Client, callback_query: CallbackQuery)
         page = 0  # Если что-то пошло не так при конвертации, начинаем с 0
 
     chat_id = callback_query.message.chat.id
-    words = db.get_chat_badwords(chat_id)
+    words = await adb.get_chat_badwords(chat_id, include_quarantined=True)
 
     # Если слов нет, сразу возвращаемся
     if not words:
@@ -115,13 +117,12 @@ async def delete_word_handler(client: Client, callback_query: CallbackQuery) ->
 
     try:
         # Пример строки: "del_word_{chat_id}_{word}"
-        _, chat_id_str, word = callback_data.split("_", 2)
+        chat_id_str, word = callback_data.removeprefix("del_word_").split("_", 1)
         chat_id = int(chat_id_str)
 
-        db.cursor.execute(
-            "DELETE FROM chat_badwords WHERE chat_id = ? AND word = ?", (chat_id, word)
-        )
-        db.connection.commit()
+        if not await adb.delete_chat_badword(chat_id, word):
+            await callback_query.answer("Ошибка при удалении слова", show_alert=True)
+            return
 
         await callback_query.answer(f"Слово '{word}' удалено!")
         await remove_badword_handler(client, callback_query)
@@ -166,7 +167,9 @@ async def ban_user_callback(client: Client, callback_query: CallbackQuery) -> No
             )
 
         await client.ban_chat_member(chat_id, user_id)
-        db.update_stats(chat_id, banned=True)
+        await adb.update_stats(chat_id, banned=True)
+        # Снимаем пометку на бан: иначе check_pending_ban срабатывает и дальше
+        await adb.confirm_ban(user_id)
 
         await client.delete_messages(chat_id, [msg_id, callback_query.message.id])
         answer = "Пользователь забанен!"
@@ -184,6 +187,71 @@ async def ban_user_callback(client: Client, callback_query: CallbackQuery) -> No
         await callback_query.answer(answer, show_alert=True)
 
 
+async def unban_user_callback(_: Client, callback_query: CallbackQuery) -> None:
+    """
+    Обработчик кнопки "Разрешить пользователя": сбрасывает счётчик спама и пометку
+    на бан, после чего удаляет сообщение с кнопками.
+    """
+    callback_data = safe_get_callback_data(callback_query)
+    if not callback_data:
+        await callback_query.answer("Нет данных.", show_alert=True)
+        return
+
+    answer = "OK"
+    try:
+        data = callback_data.lower().replace("unban_user_", "").split("_")
+        if len(data) < 2:
+            raise ValueError("Недостаточно данных для разблокировки пользователя.")
+
+        user_id = int(data[0])
+        if await adb.reject_ban(user_id):
+            await callback_query.message.delete()
+            answer = "Пользователь разрешён."
+        else:
+            answer = "Не удалось снять пометку на бан."
+    except ValueError as e:
+        logger.error(f"Ошибка при обработке данных разблокировки: {e}")
+        answer = str(e)
+    except Exception as e:
+        logger.error(f"Error unbanning user: {e}")
+        answer = "Произошла ошибка при разблокировке пользователя."
+    finally:
+        await callback_query.answer(answer, show_alert=True)
+
+
+async def ban_wave_callback(client: Client, callback_query: CallbackQuery) -> None:
+    """
+    Банит всех подозрительных участников из сводного сообщения о волне вступлений
+    и удаляет служебные сообщения о их вступлении.
+    """
+    callback_data = safe_get_callback_data(callback_query)
+    prompt = join_waves.pop_prompt(callback_data.replace("ban_wave_", "", 1))
+    chat_id = callback_query.message.chat.id
+    if prompt is None or prompt.chat_id != chat_id:
+        await callback_query.answer("Список устарел.", show_alert=True)
+        return
+
+    banned = 0
+    for user_id in prompt.user_ids:
+        if await admin_cache.is_admin(client, chat_id, user_id):
+            continue
+        try:
+            await client.ban_chat_member(chat_id, user_id)
+            await adb.update_stats(chat_id, banned=True)
+            banned += 1
+        except Exception as e:
+            logger.error(f"Error banning user {user_id}: {e}")
+
+    try:
+        await client.delete_messages(
+            chat_id, prompt.message_ids + [callback_query.message.id]
+        )
+    except Exception as e:
+        logger.error(f"Error deleting join messages: {e}")
+    await callback_query.answer(
+        f"Забанено: {banned} из {len(prompt.user_ids)}", show_alert=True
+    )
+
 
 async def stats_callback(client: Client, callback_query: CallbackQuery) -> None:
     """
@@ -192,12 +260,18 @@ async def stats_callback(client: Client, callback_query: CallbackQuery) -> None:
     callback_data = safe_get_callback_data(callback_query)
     if callback_data == "stats":
         chat_id = callback_query.message.chat.id
-        stats = db.get_stats(chat_id)
+        stats = await adb.get_stats(chat_id)
+        today = await adb.get_daily_stats(chat_id, days=1)
+        _, total, spam, deleted, banned, users = (
+            today[0] if today else ("", 0, 0, 0, 0, 0)
+        )
         if stats and len(stats) >= 2:
             await callback_query.message.edit_text(
                 f"📊 Статистика чата:\n\n"
                 f"Всего сообщений обработано: {stats[0]}\n"
-                f"Из них удалено сообщений: {stats[1]}\n",
+                f"Из них удалено сообщений: {stats[1]}\n\n"
+                f"Сегодня: {total} сообщений от {users} участников, "
+                f"спам: {spam}, удалено: {deleted}, забанено: {banned}\n",
                 reply_markup=InlineKeyboardMarkup(
                     [
                         [
@@ -230,7 +304,7 @@ async def stats_graph_callback(client: Client, callback_query: CallbackQuery) ->
     callback_data = safe_get_callback_data(callback_query)
     if callback_data == "stats_graph":
         chat_id = callback_query.message.chat.id
-        result = db.get_stats_graph(chat_id)
+        result = await adb.get_stats_graph(chat_id)
         if isinstance(result, str):
             await callback_query.message.reply_photo(
                 result,
@@ -267,7 +341,7 @@ async def list_badwords_callback(client: Client, callback_query: CallbackQuery)
     callback_data = safe_get_callback_data(callback_query)
     if callback_data == "list_badwords":
         chat_id = callback_query.message.chat.id
-        words = db.get_chat_badwords(chat_id)
+        words = await adb.get_chat_badwords(chat_id, include_quarantined=True)
         if not words:
             await callback_query.message.edit_text(
                 "Список запрещённых слов пуст.",
@@ -309,7 +383,7 @@ async def delete_callback(client: Client, callback_query: CallbackQuery) -> None
 
             if messages_to_delete:
                 await client.delete_messages(message.chat.id, messages_to_delete)
-                db.update_stats(message.chat.id, deleted=True)
+                await adb.update_stats(message.chat.id, deleted=True)
                 logger.info(
                     f"Messages {messages_to_delete} deleted in chat {message.chat.id}"
                 )
@@ -347,15 +421,8 @@ async def autoclean_settings_callback(
     """
     callback_data = safe_get_callback_data(callback_query)
     if callback_data == "autoclean_settings":
-        chat_id = str(callback_query.message.chat.id)
-        try:
-            with open("autos.txt", "r", encoding="utf-8") as f:
-                autos = f.read().splitlines()
-        except FileNotFoundError:
-            autos = []
-
-        is_auto = chat_id in autos
-        status = "✅ Включена" if is_auto else "❌ Выключена"
+        settings = await adb.get_chat_settings(callback_query.message.chat.id)
+        status = "✅ Включена" if settings.autoclean else "❌ Выключена"
 
         autoclean_markup = InlineKeyboardMarkup(
             [
@@ -385,23 +452,15 @@ async def toggle_autoclean_callback(
     """
     callback_data = safe_get_callback_data(callback_query)
     if callback_data == "toggle_autoclean":
-        chat_id = str(callback_query.message.chat.id)
-
-        try:
-            with open("autos.txt", "r", encoding="utf-8") as f:
-                autos = f.read().splitlines()
-        except FileNotFoundError:
-            autos = []
-
-        if chat_id in autos:
-            autos.remove(chat_id)
-            status = "❌ Выключена"
-        else:
-            autos.append(chat_id)
-            status = "✅ Включена"
-
-        with open("autos.txt", "w", encoding="utf-8") as f:
-            f.write("\n".join(autos))
+        previous = await adb.toggle_chat_setting(
+            callback_query.message.chat.id, "autoclean"
+        )
+        if previous is None:
+            await callback_query.answer(
+                "Не удалось сохранить настройки.", show_alert=True
+            )
+            return
+        status = "❌ Выключена" if previous.autoclean else "✅ Включена"
 
         autoclean_markup = InlineKeyboardMarkup(
             [
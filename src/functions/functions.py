@@ -1,35 +1,32 @@
 import asyncio
-import datetime
 import json
 import os
-import re
-from functools import lru_cache
 from random import randint
 from typing import List, Optional, Union
 
-import aiohttp
-import pyrogram
-import pyrogram.errors
 import unidecode
 from pyrogram.client import Client
-from pyrogram.enums import ChatMemberStatus, ChatType
+from pyrogram.enums import ChatType
 from pyrogram.types import (
-    InlineKeyboardButton,
-    InlineKeyboardMarkup,
+    ChatMemberUpdated,
     InputMediaPhoto,
     Message,
 )
 
 from src.constants import (
     ARG_DEFINITIONS,
+    DASHBOARD_ARGS,
     DONAT_MESSAGE,
     NOTION_MESSAGE,
     SPAM_THRESHOLD,
     START_MESSAGE,
-    token,
     waiting_for_word,
 )
-from src.database import db
+from src.admins import ADMIN_STATUSES, admin_cache
+from src.database import adb
+from src.funstat import funstat
+from src.graphs import graph_renderer
+from src.join_waves import join_waves
 from src.markups.markups import (
     get_ban_button,
     get_donations_buttons,
@@ -39,36 +36,15 @@ from src.markups.markups import (
     get_users_ban_pending,
 )
 from src.setup_bot import bot
+from src.spam.keywords import keyword_registry
+from src.spam.normalization import transliterate
+from src.spam.regex_safety import find_unsafe_construct
+from src.spam.scoring import ScanResult, scan_message_async
+from src.spam.verdicts import verdict_cache
 from src.utils.logger_config import logger
 from src.utils.parse_argument import parse_arguments
 
 
-# ------------------ Utilities for reading/writing autos.txt ------------------ #
-def read_autos() -> List[str]:
-    """
-    Считывает список идентификаторов чатов (автоматическая модерация) из файла autos.txt.
-
-    :return: Список строковых идентификаторов чатов.
-    """
-    try:
-        with open("autos.txt", "r", encoding="utf-8") as f:
-            return list(filter(None, f.read().splitlines()))
-    except FileNotFoundError:
-        logger.error("Файл autos.txt не найден, создаю новый.")
-        return []
-
-
-def write_autos(autos: List[str]) -> None:
-    """
-    Перезаписывает файл autos.txt новыми данными.
-
-    :param autos: Список строковых идентификаторов чатов, которые нужно записать.
-    :return: None
-    """
-    with open("autos.txt", "w", encoding="utf-8") as f:
-        f.write("\n".join(autos))
-
-
 # ------------------ Bot commands and handlers ------------------ #
 async def start(_: Client, message: Message) -> None:
     """
@@ -105,14 +81,25 @@ async def is_user_message_admin(message: Message) -> bool:
     :param message: Объект сообщения Pyrogram.
     :return: True, если статус пользователя ADMINISTRATOR/OWNER или если он числится в БД как админ; иначе False.
     """
-    try:
-        user = await bot.get_chat_member(message.chat.id, message.from_user.id)
-    except pyrogram.errors.UserNotParticipant:
-        return False
-    return (
-        user.status in (ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER)
-        or message.from_user.id in db.get_admins()
-    )
+    return await admin_cache.is_admin(bot, message.chat.id, message.from_user.id)
+
+
+async def on_chat_member_updated(_: Client, update: ChatMemberUpdated) -> None:
+    """
+    Сбрасывает кэш администраторов чата, если участник стал администратором
+    или перестал им быть.
+
+    :param _: Объект клиента Pyrogram (не используется).
+    :param update: Объект изменения участника чата Pyrogram.
+    :return: None
+    """
+    statuses = {
+        member.status
+        for member in (update.old_chat_member, update.new_chat_member)
+        if member is not None
+    }
+    if statuses.intersection(ADMIN_STATUSES):
+        admin_cache.invalidate(update.chat.id)
 
 
 async def get_stats(_: Client, message: Message) -> None:
@@ -124,7 +111,7 @@ async def get_stats(_: Client, message: Message) -> None:
     :param message: Объект сообщения Pyrogram.
     :return: None
     """
-    result = db.get_stats_graph(message.chat.id)
+    result = await adb.get_stats_graph(message.chat.id)
     if isinstance(result, str):
         await message.reply_photo(result)
     elif isinstance(result, list):
@@ -132,6 +119,49 @@ async def get_stats(_: Client, message: Message) -> None:
         await message.reply_media_group(media)
 
 
+async def dashboard(_: Client, message: Message) -> None:
+    """
+    Отправляет обзорный график по самым активным чатам бота: сообщения и спам
+    за период и тепловую карту доли спама по дням.
+    Аргументы разбираются по схеме DASHBOARD_ARGS (days, limit), например: /dashboard 14 5.
+
+    :param _: Объект клиента Pyrogram (не используется).
+    :param message: Объект сообщения Pyrogram с аргументами после команды.
+    :return: None
+    """
+    args = parse_arguments(message.text.split()[1:], DASHBOARD_ARGS)
+    days = min(max(args["days"] or 30, 1), 365)
+    limit = min(max(args["limit"] or 10, 1), 50)
+    result = await adb.get_dashboard_graph(days, limit)
+    if result:
+        await message.reply_photo(result)
+    else:
+        await message.reply(f"За последние {days} дн. сообщений нет.")
+
+
+async def cache_stats(_: Client, message: Message) -> None:
+    """
+    Отправляет счётчики кэша вердиктов (размер, попадания, промахи), чтобы подобрать его размер,
+    попадания кэша администраторов, счётчики запросов к FunStat и кэша графиков.
+
+    :param _: Объект клиента Pyrogram (не используется).
+    :param message: Объект сообщения Pyrogram.
+    :return: None
+    """
+    stats = verdict_cache.stats()
+    await message.reply(
+        f"📦 Кэш вердиктов: {stats['size']}/{stats['maxsize']}\n"
+        f"Попадания: {stats['hits']}, промахи: {stats['misses']} "
+        f"({stats['hit_rate']:.1%})\n"
+        f"Устарели: {stats['expired']}, вытеснены: {stats['evicted']}\n"
+        f"👮 Кэш администраторов: попадания: {admin_cache.hits}, "
+        f"промахи: {admin_cache.misses}\n"
+        f"🔎 FunStat: запросы: {funstat.requests}, объединены: {funstat.coalesced}, "
+        f"из кэша: {funstat.cached}\n"
+        f"📈 Графики: из кэша: {graph_renderer.hits}, отрисованы: {graph_renderer.misses}"
+    )
+
+
 async def gen_regex(_: Client, message: Message) -> None:
     """
     Генерирует регулярное выражение, объединяющее все запрещённые слова для текущего чата.
@@ -141,6 +171,7 @@ async def gen_regex(_: Client, message: Message) -> None:
     :param message: Объект сообщения Pyrogram.
     :return: None
     """
+    await keyword_registry.load(message.chat.id)
     keywords = get_keywords(message.chat.id) or ["слово"]
     pattern = r"(" + "|".join(keywords) + r")"
     await message.reply(pattern)
@@ -192,7 +223,7 @@ async def get_commons(_: Client, message: Message) -> None:
             if args["min_len"] > args["max_len"]:
                 args["min_len"], args["max_len"] = args["max_len"], args["min_len"]
 
-        result = db.get_most_common_word(
+        result = await adb.get_most_common_word(
             args["min_len"], args["max_len"], args["limit"], args["reverse"]
         )
 
@@ -221,7 +252,7 @@ async def check_command(client: Client, message: Message) -> None:
         else:
             user_id = int(user_id_str)
 
-        if user_id in db.get_pending_bans():
+        if await adb.is_ban_pending(user_id):
             await message.reply(
                 "Этот пользователь помечен как спамер!",
                 reply_markup=get_ban_button(user_id, message.id),
@@ -235,88 +266,49 @@ async def check_command(client: Client, message: Message) -> None:
         await message.reply(f"Ошибка при обработке запроса. {e}")
 
 
-async def on_new_member(_: Client, message: Message) -> None:
+async def on_new_member(client: Client, message: Message) -> None:
     """
     Обрабатывает событие добавления нового участника в чат.
     1) Если бот сам только что добавлен в чат, регистрирует чат в БД и отправляет приветственное сообщение.
-    2) Если новый пользователь помечен как забаненный, предлагает админам сразу же его забанить.
+    2) Иначе добавляет участников в волну вступлений (см. JoinWaveCollector): по окончании окна
+       они проверяются пачкой, и админам приходит одно сводное сообщение о подозрительных.
 
-    :param _: Объект клиента Pyrogram (не используется).
+    :param client: Объект клиента Pyrogram.
     :param message: Объект сообщения Pyrogram (с new_chat_members).
     :return: None
     """
     for new_member in message.new_chat_members:
         if new_member.is_self:
             if message.chat.id == "-1001515209846":
-                await leave_chat(_, message)
-            await start(_, message)
-            db.add_chat(message.chat.id, message.chat.title)
+                await leave_chat(client, message)
+            await start(client, message)
+            await adb.add_chat(message.chat.id, message.chat.title)
             break
 
-        if db.is_user_banned(new_member.id):
-            reply_markup = InlineKeyboardMarkup(
-                [
-                    [
-                        InlineKeyboardButton(
-                            "🚫 Забанить",
-                            callback_data=f"ban_{message.id}_{message.from_user.id}",
-                        ),
-                        InlineKeyboardButton("❌ Отмена", callback_data="cancel"),
-                    ]
-                ]
-            )
-            await message.reply(
-                "Пользователь помечен как спамер!\nНужно ли его забанить?",
-                reply_markup=reply_markup,
-            )
+        join_waves.add(client, message.chat.id, message.id, new_member)
 
 
-def search_keywords(text: Union[str, int], chat_id: Optional[int] = None) -> bool:
+async def score_message(
+    text: Union[str, int], chat_id: Optional[int] = None
+) -> ScanResult:
     """
-    Ищет запрещенные слова и паттерны (спецсимволы, подозрительные конструкции) в тексте.
-    Считает условный 'score', сравнивает с SPAM_THRESHOLD, если score >= порога — считается спамом.
+    Проверяет сообщение за один проход: считает условный 'score' по запрещённым словам,
+    спецсимволам и подозрительным конструкциям, сравнивает его с SPAM_THRESHOLD и
+    запоминает найденные запрещённые слова для выделения без повторного поиска.
+    Если порог набран до поиска слов, поиск пропускается и участков у результата нет.
 
     :param text: Текст сообщения (или некорректный тип, тогда бросится ошибка).
     :param chat_id: Идентификатор чата для использования конкретного списка запрещенных слов (опционально).
-    :return: True, если найден спам; False в противном случае.
+    :return: Объект ScanResult (score, сработавшие правила, участки с запрещёнными словами).
     """
     if not text or not isinstance(text, str):
         raise ValueError("Текст должен быть непустой строкой")
 
     try:
-        score = 0
-        keywords = get_keywords(chat_id) or ["слово"]
-        normalized_text = unidecode.unidecode(text.lower().strip())
-
-        # Проверка запрещенных слов
-        keyword_pattern = r"(" + "|".join(map(re.escape, keywords)) + r")"
-        found_keywords = len(re.findall(keyword_pattern, normalized_text))
-        score += found_keywords
-
-        # Проверка специальных символов (каждое совпадение добавляет 2 к score)
-        special_chars_found = sum(
-            bool(re.search(pattern, text)) for pattern in get_special_patterns()
-        )
-        score += special_chars_found * 2
-
-        # Подозрительные паттерны
-        suspicious_patterns = [
-            r"\b(прем|премиум|premium)\b.*?@\w+",
-            r"@\w+.*?\b(прем|премиум|premium)\b",
-            r"\b(тут|here)\b.*?@\w+",
-            r"@\w+.*?\b(тут|here)\b",
-            r"➡️.*?@\w+",
-            r"@\w+.*?➡️",
-        ]
-        for pattern in suspicious_patterns:
-            if re.search(pattern, normalized_text, re.IGNORECASE):
-                score += 5
-
-        return score >= SPAM_THRESHOLD
-
+        return await scan_message_async(text, chat_id, SPAM_THRESHOLD)
     except Exception as e:
         logger.error(f"Ошибка при поиске ключевых слов: {str(e)}")
-        return False
+        return ScanResult()
 
 
 async def set_threshold(_: Client, message: Message) -> None:
@@ -365,34 +357,6 @@ async def set_threshold(_: Client, message: Message) -> None:
         await message.reply(f"Ошибка при установке порога: {str(e)}")
 
 
-def highlight_banned_words(text: str, chat_id: Optional[int] = None) -> str:
-    """
-    Выделяет запрещённые слова в тексте, оборачивая их в тэги < >.
-    Если список слов пуст, возвращает исходный текст без изменений.
-
-    :param text: Исходный текст сообщения.
-    :param chat_id: Идентификатор чата для получения конкретного списка слов (опционально).
-    :return: Преобразованный текст, где все запрещенные слова обёрнуты в <>.
-    """
-    if not text or not isinstance(text, str):
-        return text
-
-    try:
-        keywords = get_keywords(chat_id) or []
-        if not keywords:
-            return text
-
-        pattern = r"\b(" + "|".join(map(re.escape, keywords)) + r")\b"
-
-        def replacer(match):
-            return f"<{match.group(0)}>"
-
-        return re.sub(pattern, replacer, text, flags=re.IGNORECASE)
-    except Exception as e:
-        logger.error(f"Ошибка при выделении запрещенных слов: {str(e)}")
-        return text
-
-
 async def add_badword(_: Client, message: Message) -> None:
     """
     Добавляет новое слово в глобальный список запрещенных слов (в файл bad_words.txt).
@@ -402,32 +366,13 @@ async def add_badword(_: Client, message: Message) -> None:
     :return: None
     """
     word = " ".join(message.text.split(" ")[1:])
-    with open("bad_words.txt", "a", encoding="utf-8") as f:
-        f.write(f"\n{unidecode.unidecode(word.lower())}")
+    keyword_registry.global_words.add(word)
     keywords = get_keywords()
     await message.reply(
         f"Добавлено слово: {word}\nТекущий список запрещенных слов:\n{', '.join(keywords)}"
     )
 
 
-@lru_cache(maxsize=128)
-def get_special_patterns() -> List[str]:
-    """
-    Возвращает список регулярных выражений для поиска особых (нетипичных) символов,
-    например, редких Юникод-блоков, которые часто используются в спаме.
-
-    :return: Список строк (паттерны регулярных выражений).
-    """
-    return [
-        r"[\u0500-\u052F]",  # Доп. символы Кириллицы
-        r"[\u0180-\u024F]",  # Расширенная латиница
-        r"[\u1D00-\u1D7F]",  # Фонетические символы
-        r"[\u1E00-\u1EFF]",  # Расширенная латиница (доп. формы)
-        r"[\u1100-\u11FF]",  # Корейские символы (Hangul)
-        r"[\uFF00-\uFFEF]",  # Полуширина и полноширина форм
-    ]
-
-
 async def menu_command(_: Client, message: Message) -> None:
     """
     Отправляет главное меню настроек бота (inline-кнопки).
@@ -452,18 +397,15 @@ def get_keywords(chat_id: Optional[int] = None) -> List[str]:
     """
     Возвращает общий список запрещённых слов (из файла bad_words.txt),
     а также слова, добавленные именно для указанного чата (если передан chat_id).
+    Список берётся из кэша keyword_registry и не перечитывается на каждый вызов;
+    слова чата должны быть заранее загружены через keyword_registry.load.
 
     :param chat_id: Идентификатор чата (опционально).
-    :return: Список уникальных слов (в нижнем регистре, без пробелов).
+    :return: Список уникальных слов в синтаксисе регулярных выражений (в нижнем регистре,
+             слова из файла экранированы).
     """
     try:
-        with open("bad_words.txt", "r", encoding="utf-8") as f:
-            main_words = unidecode.unidecode(
-                f.read().lower().replace(" ", r"\s")
-            ).splitlines()
-        chat_keywords = db.get_chat_badwords(chat_id) if chat_id else []
-        all_words = set(filter(None, main_words + chat_keywords))
-        return list(all_words)
+        return list(keyword_registry.get(chat_id).keywords)
     except Exception as e:
         logger.error(f"Error reading keywords: {e}")
         return []
@@ -471,7 +413,7 @@ def get_keywords(chat_id: Optional[int] = None) -> List[str]:
 
 async def check_user(user_id: Optional[int] = None) -> Union[bool, Optional[str]]:
     """
-    Проверяет пользователя (user_id) через FunStat API (https://funstat.org),
+    Проверяет пользователя (user_id) через FunStat API (https://funstat.org, см. FunStatClient),
     чтобы выяснить, соответствует ли он критериям "проверенный".
     Если пользователь уже есть в БД verified_users, возвращает True.
     Если данные получены и пользователь старше 60 дней, записывает в verified_users и возвращает JSON.
@@ -482,45 +424,14 @@ async def check_user(user_id: Optional[int] = None) -> Union[bool, Optional[str]
     """
     if not user_id:
         return False
-    if db.is_user_verified(user_id):
+    if await adb.is_user_verified(user_id):
         return True
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"https://funstat.org/api/v1/users/{user_id}/stats_min",
-                headers={
-                    "accept": "application/json",
-                    "Authorization": f"Bearer {token}",
-                },
-            ) as response:
-                result = await response.json()
-                if response.status != 200:
-                    logger.error(f"API вернул статус {response.status}")
-                    return False
-
-                first_msg_date_str = result.get("first_msg_date")
-                if not first_msg_date_str:
-                    return False
-
-                first_msg_date = datetime.datetime.strptime(
-                    first_msg_date_str, "%Y-%m-%dT%H:%M:%SZ"
-                ).replace(tzinfo=datetime.timezone.utc)
-                now = datetime.datetime.now(datetime.timezone.utc)
-                delta = now - first_msg_date
-
-                if delta >= datetime.timedelta(days=60):
-                    user_data = {
-                        "first_msg_date": first_msg_date_str,
-                        "messages_count": result.get("messages_count", 0),
-                        "chats_count": result.get("chats_count", 0),
-                    }
-                    db.add_verified_user(user_id, user_data)
-                    return json.dumps(user_data)
-                return False
-    except Exception as e:
-        logger.error(f"Error checking user: {e}")
+    user_data = await funstat.check(user_id)
+    if user_data is None:
         return False
+    await adb.add_verified_user(user_id, user_data)
+    return json.dumps(user_data)
 
 
 async def postbot_filter(_: Client, message: Message) -> None:
@@ -555,6 +466,8 @@ async def leave_chat(_: Client, message: Message) -> None:
 
     await bot.send_message(chat_id, "До свидания!")
     await bot.leave_chat(chat_id, delete=True)
+    if str(chat_id).lstrip("-").isdigit():
+        await adb.remove_chat(int(chat_id))
 
 
 async def send_notion(client: Client, message: Message) -> None:
@@ -583,7 +496,7 @@ async def send_test(client: Client, message: Message) -> None:
     :param message: Объект сообщения Pyrogram (отправившего команду).
     :return: None
     """
-    for chat, title in db.get_all_chats():
+    for chat, title in await adb.get_all_chats():
         try:
             await client.send_message(
                 chat,
@@ -595,21 +508,16 @@ async def send_test(client: Client, message: Message) -> None:
             await message.reply(f"{chat, title, str(e)}")
 
 
-def ensure_chat_exists(chat_id: int, chat_title: Optional[str] = None) -> None:
+async def ensure_chat_exists(chat_id: int, chat_title: Optional[str] = None) -> None:
     """
-    Проверяет, зарегистрирован ли чат в БД. Если нет — добавляет запись с chat_id и названием.
+    Регистрирует чат в БД, если его там ещё нет или у него сменилось название.
+    Известные чаты проверяются в памяти, без обращения к базе.
 
     :param chat_id: Идентификатор чата (int).
     :param chat_title: Название чата (str) или None.
     :return: None
     """
-    db.cursor.execute("SELECT chat_id FROM chats WHERE chat_id = ?", (chat_id,))
-    if not db.cursor.fetchone():
-        db.cursor.execute(
-            "INSERT INTO chats (chat_id, title) VALUES (?, ?)",
-            (chat_id, chat_title or "Неизвестный чат"),
-        )
-        db.connection.commit()
+    await adb.add_chat(chat_id, chat_title or "Неизвестный чат")
 
 
 # ------------------ Main message handler ------------------ #
@@ -620,9 +528,10 @@ async def main(client: Client, message: Message) -> None:
     2) Проверку пользователя на pending_ban,
     3) Проверку, не идёт ли сейчас добавление нового запрещённого слова,
     4) Случайную отправку информационного сообщения (send_notion),
-    5) Поиск спам-паттернов (search_keywords),
+    5) Поиск спам-паттернов (score_message),
     6) Сохранение пользователя и сообщения в БД,
-    7) При необходимости — вызов handle_spam.
+    7) При необходимости — вызов handle_spam,
+    8) Уведомление чатов о регулярках, отправленных в карантин.
 
     :param client: Объект клиента Pyrogram.
     :param message: Объект сообщения Pyrogram.
@@ -643,13 +552,14 @@ async def main(client: Client, message: Message) -> None:
         if randint(1, 2000) == 1:
             await send_notion(client, message)
 
-        autos = read_autos()
-        ensure_chat_exists(message.chat.id, message.chat.title)
+        await ensure_chat_exists(message.chat.id, message.chat.title)
 
-        is_spam = search_keywords(message.text, message.chat.id)
+        # Слова чата подгружаются через adb, сама проверка к базе не обращается
+        await keyword_registry.load(message.chat.id)
+        scan = await score_message(message.text, message.chat.id)
 
         # Сохраняем/обновляем информацию о пользователе
-        db.add_user(
+        await adb.add_user(
             user_id=message.from_user.id,
             first_name=message.from_user.first_name,
             username=message.from_user.username,
@@ -662,18 +572,24 @@ async def main(client: Client, message: Message) -> None:
             else None
         )
 
-        # Сохраняем сообщение в БД
-        db.add_message(
+        # Сохраняем сообщение в БД (слова выделяются по уже найденным участкам).
+        # Проверка останавливается до поиска слов только на спаме, который уже набрал
+        # порог дешёвыми правилами (вес правила слов не ограничен, поэтому выход
+        # "порог недостижим" не срабатывает). Такие спам-сообщения сохраняются без
+        # выделения <…>: слова в уже опознанном спаме не ищутся ради разметки
+        await adb.add_message(
             message.chat.id,
             message.from_user.id,
-            highlight_banned_words(message.text, message.chat.id),
-            is_spam,
+            scan.highlight(message.text),
+            scan.is_spam,
             message_url,
         )
 
         # Если сообщение — спам
-        if is_spam:
-            await handle_spam(message, autos)
+        if scan.is_spam:
+            await handle_spam(message)
+
+        await report_quarantined_patterns(client)
     except Exception as e:
         logger.exception(f"Error processing message: {e}")
 
@@ -706,7 +622,7 @@ async def check_pending_ban(message: Message) -> bool:
     :param message: Объект сообщения Pyrogram.
     :return: True, если пользователь уже помечен на бан; False иначе.
     """
-    if message.from_user.id in db.get_pending_bans():
+    if await adb.is_ban_pending(message.from_user.id):
         await message.reply(
             "@admins Этот пользователь помечен как спамер! Будьте внимательнее!",
             reply_markup=get_users_ban_pending(message.from_user.id, message.id),
@@ -725,8 +641,14 @@ async def handle_new_badword(message: Message) -> bool:
     """
     if waiting_for_word.get(message.from_user.id):
         word = message.text.strip()
-        success = db.add_chat_badword(message.chat.id, word, message.from_user.id)
         waiting_for_word[message.from_user.id] = False
+        reason = find_unsafe_construct(transliterate(word.lower()))
+        if reason:
+            await message.reply(f"❌ Паттерн **{word}** отклонён: {reason}")
+            return True
+        success = await adb.add_chat_badword(
+            message.chat.id, word, message.from_user.id
+        )
         reply_text = (
             f"✅ Слово **{word}** добавлено в список запрещенных!\n\n"
             if success
@@ -738,19 +660,37 @@ async def handle_new_badword(message: Message) -> bool:
     return False
 
 
-async def handle_spam(message: Message, autos: List[str]) -> None:
+async def report_quarantined_patterns(client: Client) -> None:
+    """
+    Сообщает администраторам чатов о регулярках, отправленных в карантин
+    из-за многократного превышения лимита времени.
+
+    :param client: Объект клиента Pyrogram.
+    :return: None
+    """
+    for chat_id, pattern in keyword_registry.pop_quarantined():
+        try:
+            await client.send_message(
+                chat_id,
+                f"@admins ⚠️ Паттерн **{pattern}** отключён: он несколько раз "
+                "выполнялся слишком долго. Удалите или упростите его в настройках фильтра.",
+            )
+        except Exception as e:
+            logger.error(f"Error reporting quarantined pattern: {e}")
+
+
+async def handle_spam(message: Message) -> None:
     """
     Обрабатывает сообщение, распознанное как спам:
     1) Добавляет предупреждение в БД,
     2) Если пользователь — администратор, шутит,
-    3) Если чат в списке autos, удаляет сообщение,
+    3) Если в чате включена автомодерация, удаляет сообщение,
     4) Иначе предлагает админам забанить пользователя.
 
     :param message: Объект сообщения Pyrogram, распознанное как спам.
-    :param autos: Список идентификаторов чатов, в которых настроен автоматический режим (без вопроса).
     :return: None
     """
-    db.add_spam_warning(message.from_user.id, message.chat.id, message.text)
+    await adb.add_spam_warning(message.from_user.id, message.chat.id, message.text)
 
     # Если сообщение длинное (> 1000), то просто не продолжаем (может быть flood)
     if len(message.text) > 1000:
@@ -759,8 +699,9 @@ async def handle_spam(message: Message, autos: List[str]) -> None:
     if await is_user_message_admin(message):
         await message.reply("Тебе не стыдно?")
 
-    if str(message.chat.id) in autos:
+    if (await adb.get_chat_settings(message.chat.id)).autoclean:
         await message.delete()
+        await adb.update_stats(message.chat.id, deleted=True)
     else:
         await message.reply(
             "Подозрительное сообщение!",
@@ -771,24 +712,24 @@ async def handle_spam(message: Message, autos: List[str]) -> None:
 # ------------------ Autos settings ------------------ #
 async def remove_autos(_: Client, message: Message) -> None:
     """
-    Удаляет текущий чат из списка autos (автоматическая модерация).
+    Выключает автомодерацию в текущем чате.
 
     :param _: Объект клиента Pyrogram (не используется).
     :param message: Объект сообщения Pyrogram.
     :return: None
     """
-    autos = read_autos()
-    try:
-        autos.remove(str(message.chat.id))
-        write_autos(autos)
+    previous = await adb.update_chat_settings(message.chat.id, autoclean=False)
+    if previous is None:
+        await message.reply("Не удалось сохранить настройки.")
+    elif previous.autoclean:
         await message.reply("Авто удалено!")
-    except ValueError:
+    else:
         await message.reply("Этого чата нет в списке авто.")
 
 
 async def search(_: Client, message: Message) -> None:
     try:
-        result = db.search(message.text.split()[1::])
+        result = await adb.search(message.text.split()[1::])
         if not result:
             result = "ничего("
         await message.reply(result)
@@ -798,29 +739,29 @@ async def search(_: Client, message: Message) -> None:
 
 async def get_autos(_: Client, message: Message) -> None:
     """
-    Выводит список всех чатов, занесённых в autos.txt.
+    Выводит список всех чатов с включённой автомодерацией.
 
     :param _: Объект клиента Pyrogram (не используется).
     :param message: Объект сообщения Pyrogram.
     :return: None
     """
-    autos = read_autos()
-    await message.reply("\n".join(autos) if autos else "Список пуст.")
+    autos = await adb.get_autoclean_chats()
+    await message.reply("\n".join(map(str, autos)) if autos else "Список пуст.")
 
 
 async def add_autos(_: Client, message: Message) -> None:
     """
-    Добавляет текущий чат в список autos (автоматическая модерация).
-    Если он уже есть — выводит сообщение, что чат уже в списке.
+    Включает автомодерацию в текущем чате.
+    Если она уже включена — выводит сообщение, что чат уже в списке.
 
     :param _: Объект клиента Pyrogram (не используется).
     :param message: Объект сообщения Pyrogram.
     :return: None
     """
-    autos = read_autos()
-    if str(message.chat.id) not in autos:
-        autos.append(str(message.chat.id))
-        write_autos(autos)
+    previous = await adb.update_chat_settings(message.chat.id, autoclean=True)
+    if previous is None:
+        await message.reply("Не удалось сохранить настройки.")
+    elif not previous.autoclean:
         msg = await message.reply("Чат добавлен!")
         await asyncio.sleep(15)
         await message.delete()
@@ -0,0 +1,163 @@
+import asyncio
+import datetime
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+from src.constants import FUNSTAT_URL, token
+from src.utils.logger_config import logger
+
+# Минимальный возраст аккаунта (по первому сообщению) для статуса "проверенный"
+MIN_ACCOUNT_AGE = datetime.timedelta(days=60)
+
+# Данные, которые записываются в verified_users
+UserStats = Dict[str, object]
+
+
+class FunStatClient:
+    """
+    Клиент FunStat API (https://funstat.org) для проверки возраста аккаунтов.
+    Держит одну сессию aiohttp с пулом соединений вместо новой сессии (и нового
+    TCP+TLS соединения) на каждую проверку. Одновременные проверки одного пользователя
+    ждут один и тот же запрос. Отрицательные результаты (нет данных или аккаунт
+    слишком молодой) запоминаются на ttl секунд. Число одновременных запросов
+    ограничено concurrency.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_token: str,
+        ttl: float = 3600.0,
+        concurrency: int = 4,
+        timeout: float = 10.0,
+        maxsize: int = 10_000,
+    ) -> None:
+        """
+        :param base_url: Адрес API (например, https://funstat.org или адрес локальной заглушки).
+        :param api_token: Токен FunStat.
+        :param ttl: Время жизни отрицательного результата, в секундах.
+        :param concurrency: Максимальное число одновременных запросов.
+        :param timeout: Таймаут одного запроса, в секундах.
+        :param maxsize: Максимальное число запомненных отрицательных результатов.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.api_token = api_token
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[int, asyncio.Task] = {}
+        # user_id -> момент, до которого отрицательный результат действителен.
+        # У всех записей одинаковый ttl, поэтому порядок вставки совпадает с порядком истечения
+        self._rejected: Dict[int, float] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.cached = 0
+
+    async def start(self) -> None:
+        """
+        Создаёт сессию с пулом соединений, если она ещё не создана.
+
+        :return: None
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={
+                    "accept": "application/json",
+                    "Authorization": f"Bearer {self.api_token}",
+                },
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def close(self) -> None:
+        """
+        Закрывает сессию и её соединения.
+
+        :return: None
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def check(self, user_id: int) -> Optional[UserStats]:
+        """
+        Проверяет, что аккаунт пользователя старше MIN_ACCOUNT_AGE.
+
+        :param user_id: Идентификатор пользователя (int).
+        :return: Данные для verified_users, если аккаунт достаточно старый,
+            иначе None (в том числе при ошибке запроса).
+        """
+        expires = self._rejected.get(user_id)
+        if expires is not None:
+            if expires >= time.monotonic():
+                self.cached += 1
+                return None
+            del self._rejected[user_id]
+
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._check(user_id))
+            self._inflight[user_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+        else:
+            self.coalesced += 1
+        # Отмена одного ожидающего обработчика не должна отменять общий запрос
+        return await asyncio.shield(task)
+
+    async def _check(self, user_id: int) -> Optional[UserStats]:
+        await self.start()
+        async with self._semaphore:
+            self.requests += 1
+            try:
+                async with self._session.get(
+                    f"{self.base_url}/api/v1/users/{user_id}/stats_min"
+                ) as response:
+                    if response.status == 404:
+                        self._reject(user_id)
+                        return None
+                    if response.status != 200:
+                        logger.error(f"API вернул статус {response.status}")
+                        return None
+                    result = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"Error checking user: {e}")
+                return None
+
+        first_msg_date_str = result.get("first_msg_date")
+        if first_msg_date_str:
+            try:
+                first_msg_date = datetime.datetime.strptime(
+                    first_msg_date_str, "%Y-%m-%dT%H:%M:%SZ"
+                ).replace(tzinfo=datetime.timezone.utc)
+            except ValueError as e:
+                logger.error(f"Error checking user: {e}")
+                return None
+            now = datetime.datetime.now(datetime.timezone.utc)
+            if now - first_msg_date >= MIN_ACCOUNT_AGE:
+                return {
+                    "first_msg_date": first_msg_date_str,
+                    "messages_count": result.get("messages_count", 0),
+                    "chats_count": result.get("chats_count", 0),
+                }
+        self._reject(user_id)
+        return None
+
+    def _reject(self, user_id: int) -> None:
+        now = time.monotonic()
+        self._rejected.pop(user_id, None)
+        self._rejected[user_id] = now + self.ttl
+        # Удаляем истёкшие и самые старые записи сверх maxsize
+        while self._rejected:
+            oldest = next(iter(self._rejected))
+            if len(self._rejected) <= self.maxsize and self._rejected[oldest] >= now:
+                break
+            del self._rejected[oldest]
+
+
+funstat = FunStatClient(FUNSTAT_URL, token)
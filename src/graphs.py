@@ -0,0 +1,194 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.utils.processes import worker_context
+
+# Модуль не импортирует src.database и matplotlib: он загружается в процессах пула
+# (forkserver/spawn), а сама отрисовка находится в src.plotting и загружается там
+# только при первом графике
+
+# Параметры отрисовки. Входят в ключ кэша, поэтому при их изменении (или при
+# изменении самого графика — поле version) старые файлы перестают использоваться
+GRAPH_OPTIONS = {
+    "version": 2,
+    "style": "dark_background",
+    "figsize": (20, 10),
+    "dpi": 300,
+}
+
+# Количество сообщений и спама по дням: (день в формате YYYY-MM-DD, всего, спам)
+DailyCounts = List[Tuple[str, int, int]]
+
+# Дневная статистика нескольких чатов: (chat_id, название, день, всего, спам)
+DashboardRows = List[Tuple[int, Optional[str], str, int, int]]
+
+
+def _load_plotting() -> None:
+    import src.plotting  # noqa: F401
+
+
+def _generate_plot(data: Tuple[int, DailyCounts, str, Dict]) -> str:
+    # Выполняется в процессе пула: matplotlib загружается там, а не в процессе бота
+    from src.plotting import generate_plot
+
+    return generate_plot(data)
+
+
+def _generate_dashboard(data: Tuple[DashboardRows, List[str], str, Dict]) -> str:
+    from src.plotting import generate_dashboard
+
+    return generate_dashboard(data)
+
+
+class GraphRenderer:
+    """
+    Отрисовка графиков статистики в небольшом пуле процессов с кэшем на диске.
+    Имя файла содержит хэш от (вида графика, его данных, параметров отрисовки),
+    поэтому, пока в чате не появились новые сообщения, повторный запрос графика
+    возвращает уже готовый файл без отрисовки. Одновременные запросы одного и того же
+    графика ждут одну отрисовку. Старые графики чата удаляются после отрисовки нового.
+    """
+
+    def __init__(self, workers: int = 2, options: Optional[Dict] = None) -> None:
+        """
+        :param workers: Количество процессов для отрисовки.
+        :param options: Параметры отрисовки (по умолчанию GRAPH_OPTIONS).
+        """
+        self.workers = workers
+        self.options = dict(options or GRAPH_OPTIONS)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, prefix: str, key: object, output_dir: str) -> str:
+        """
+        Возвращает путь к файлу графика для указанных данных.
+
+        :param prefix: Начало имени файла (например, chat_<id> или dashboard).
+        :param key: Данные графика (любые значения, сериализуемые в JSON).
+        :param output_dir: Директория с графиками (str).
+        :return: Путь к файлу (str).
+        """
+        digest = hashlib.sha1(
+            json.dumps([prefix, key, self.options], sort_keys=True).encode()
+        ).hexdigest()[:16]
+        return os.path.join(output_dir, f"{prefix}_{digest}.png")
+
+    def render(self, chat_id: int, daily_counts: DailyCounts, output_dir: str) -> Future:
+        """
+        Ставит отрисовку графика чата в пул процессов или возвращает готовый файл из кэша.
+
+        :param chat_id: Идентификатор чата (int).
+        :param daily_counts: Количество сообщений и спама по дням.
+        :param output_dir: Директория с графиками (str).
+        :return: Future с путём к файлу графика.
+        """
+        return self._submit(
+            f"chat_{chat_id}", _generate_plot, (chat_id, daily_counts), output_dir
+        )
+
+    def render_dashboard(
+        self, rows: DashboardRows, days: List[str], output_dir: str
+    ) -> Future:
+        """
+        Ставит отрисовку обзорного графика по чатам в пул процессов или возвращает
+        готовый файл из кэша.
+
+        :param rows: Дневная статистика чатов (см. Database.get_dashboard_stats).
+        :param days: Дни периода (YYYY-MM-DD) по возрастанию.
+        :param output_dir: Директория с графиками (str).
+        :return: Future с путём к файлу графика.
+        """
+        return self._submit("dashboard", _generate_dashboard, (rows, days), output_dir)
+
+    def _submit(
+        self, prefix: str, func: Callable[[tuple], str], args: tuple, output_dir: str
+    ) -> Future:
+        file_path = self.path_for(prefix, args, output_dir)
+        with self._lock:
+            future = self._inflight.get(file_path)
+            if future is not None:
+                self.hits += 1
+                return future
+            if os.path.exists(file_path):
+                self.hits += 1
+                future = Future()
+                future.set_result(file_path)
+                return future
+            self.misses += 1
+
+            os.makedirs(output_dir, exist_ok=True)
+            task = (*args, file_path, self.options)
+            try:
+                future = self._start().submit(func, task)
+            except BrokenProcessPool:
+                # Процесс пула аварийно завершился (OOM, segfault): такой пул больше
+                # не принимает задачи, поэтому он пересоздаётся и задача ставится ещё раз
+                self._restart()
+                future = self._start().submit(func, task)
+            self._inflight[file_path] = future
+        future.add_done_callback(lambda done: self._done(prefix, file_path, done))
+        return future
+
+    def warm_up(self) -> None:
+        """
+        Заранее запускает процессы пула и загружает в них matplotlib, чтобы первый
+        запрос графика не ждал импорта. Не блокирует вызывающий поток.
+
+        :return: None
+        """
+        with self._lock:
+            executor = self._start()
+            for _ in range(self.workers):
+                executor.submit(_load_plotting)
+
+    def _start(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Модуль задач лёгкий и не тянет matplotlib (см. worker_context)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=worker_context()
+            )
+        return self._executor
+
+    def _restart(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _done(self, prefix: str, file_path: str, future: Future) -> None:
+        with self._lock:
+            self._inflight.pop(file_path, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            # Удаляем устаревшие версии графика (в том числе от других параметров)
+            pattern = os.path.join(
+                glob.escape(os.path.dirname(file_path)), f"{prefix}_*.png"
+            )
+            for old_path in glob.glob(pattern):
+                if old_path != file_path:
+                    try:
+                        os.remove(old_path)
+                    except OSError:
+                        pass
+
+    def close(self) -> None:
+        """
+        Дожидается поставленных отрисовок и завершает процессы пула.
+
+        :return: None
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+graph_renderer = GraphRenderer()
@@ -0,0 +1,164 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from pyrogram.client import Client
+from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup, User
+
+from src.database import adb
+from src.funstat import funstat
+from src.utils.logger_config import logger
+
+# Сколько подозрительных участников перечисляется в сводном сообщении
+PROMPT_LINES = 20
+
+
+@dataclass
+class JoinWave:
+    """
+    Участники, вступившие в чат за одно окно сбора.
+
+    :param chat_id: Идентификатор чата.
+    :param members: Новые участники по идентификаторам.
+    :param message_ids: Служебные сообщения о вступлении (удаляются вместе с баном).
+    :param task: Задача, которая закроет окно и проверит волну.
+    """
+
+    chat_id: int
+    members: Dict[int, User] = field(default_factory=dict)
+    message_ids: List[int] = field(default_factory=list)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+@dataclass
+class WavePrompt:
+    """
+    Сводное сообщение администраторам: кого банить по кнопке "Забанить всех".
+    """
+
+    chat_id: int
+    user_ids: List[int]
+    message_ids: List[int]
+
+
+class JoinWaveCollector:
+    """
+    Собирает новых участников чата за короткое окно и проверяет их пачкой:
+    забаненные и ожидающие бана находятся одним запросом IN (...), неизвестные
+    проверяются через FunStat (число одновременных запросов ограничено клиентом).
+    По итогам волны администраторам отправляется одно сводное сообщение вместо
+    сообщения на каждого участника. Молодые аккаунты без истории отмечаются только
+    в волнах от raid_size участников, чтобы не тревожить админов из-за каждого
+    нового человека.
+    """
+
+    def __init__(
+        self, window: float = 3.0, raid_size: int = 5, max_prompts: int = 100
+    ) -> None:
+        """
+        :param window: Длительность окна сбора, в секундах.
+        :param raid_size: С какого размера волны отмечаются аккаунты, не прошедшие FunStat.
+        :param max_prompts: Сколько последних сводных сообщений помнить для кнопки бана.
+        """
+        self.window = window
+        self.raid_size = raid_size
+        self.max_prompts = max_prompts
+        self._waves: Dict[int, JoinWave] = {}
+        self._prompts: Dict[str, WavePrompt] = {}
+
+    def add(self, client: Client, chat_id: int, message_id: int, member: User) -> None:
+        """
+        Добавляет нового участника в текущую волну чата (открывает волну, если её нет).
+
+        :param client: Объект клиента Pyrogram.
+        :param chat_id: Идентификатор чата (int).
+        :param message_id: Идентификатор служебного сообщения о вступлении.
+        :param member: Новый участник.
+        :return: None
+        """
+        wave = self._waves.get(chat_id)
+        if wave is None:
+            wave = self._waves[chat_id] = JoinWave(chat_id)
+            wave.task = asyncio.ensure_future(self._close_later(client, chat_id))
+        wave.members[member.id] = member
+        if message_id not in wave.message_ids:
+            wave.message_ids.append(message_id)
+
+    def pop_prompt(self, key: str) -> Optional[WavePrompt]:
+        """
+        Забирает сводное сообщение по ключу из кнопки "Забанить всех".
+
+        :param key: Ключ из callback_data.
+        :return: WavePrompt или None, если сообщение устарело.
+        """
+        return self._prompts.pop(key, None)
+
+    async def _close_later(self, client: Client, chat_id: int) -> None:
+        await asyncio.sleep(self.window)
+        wave = self._waves.pop(chat_id)
+        try:
+            await self._screen(client, wave)
+        except Exception as e:
+            logger.error(f"Error screening join wave in {chat_id}: {e}")
+
+    async def _screen(self, client: Client, wave: JoinWave) -> None:
+        user_ids = list(wave.members)
+        banned, verified = await asyncio.gather(
+            adb.get_banned_users(user_ids), adb.get_verified_users(user_ids)
+        )
+
+        reasons: Dict[int, str] = {}
+        unknown = []
+        for user_id in user_ids:
+            if user_id in banned or await adb.is_ban_pending(user_id):
+                reasons[user_id] = "помечен как спамер"
+            elif user_id not in verified:
+                unknown.append(user_id)
+
+        results = await asyncio.gather(*(funstat.check(u) for u in unknown))
+        for user_id, user_data in zip(unknown, results):
+            if user_data is not None:
+                # Положительные ответы FunStat не кэшируются: без записи в verified_users
+                # пользователь будет проверяться заново в каждой волне
+                if not await adb.add_verified_user(user_id, user_data):
+                    logger.warning(f"Verified user {user_id} was not saved")
+            elif len(user_ids) >= self.raid_size:
+                reasons[user_id] = "новый аккаунт без истории"
+
+        if reasons:
+            await self._prompt(client, wave, reasons)
+
+    async def _prompt(
+        self, client: Client, wave: JoinWave, reasons: Dict[int, str]
+    ) -> None:
+        key = uuid4().hex[:12]
+        self._prompts[key] = WavePrompt(wave.chat_id, list(reasons), wave.message_ids)
+        while len(self._prompts) > self.max_prompts:
+            del self._prompts[next(iter(self._prompts))]
+
+        lines = [
+            f"• {wave.members[user_id].mention} — {reason}"
+            for user_id, reason in list(reasons.items())[:PROMPT_LINES]
+        ]
+        if len(reasons) > PROMPT_LINES:
+            lines.append(f"…и ещё {len(reasons) - PROMPT_LINES}")
+        await client.send_message(
+            wave.chat_id,
+            f"⚠️ Вступили {len(wave.members)}, подозрительных: {len(reasons)}\n\n"
+            + "\n".join(lines),
+            reply_markup=InlineKeyboardMarkup(
+                [
+                    [
+                        InlineKeyboardButton(
+                            f"🚫 Забанить всех ({len(reasons)})",
+                            callback_data=f"ban_wave_{key}",
+                        ),
+                        InlineKeyboardButton("❌ Отмена", callback_data="cancel"),
+                    ]
+                ]
+            ),
+        )
+
+
+join_waves = JoinWaveCollector()
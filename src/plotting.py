@@ -0,0 +1,188 @@
+import os
+from datetime import date
+from typing import Dict, List, Tuple, Union
+
+import matplotlib.style
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.dates import DateFormatter, date2num
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+from scipy.interpolate import make_interp_spline
+
+from src.graphs import DailyCounts, DashboardRows
+
+# Отрисовка графиков. Модуль тяжёлый (matplotlib, numpy, scipy), поэтому бот его
+# не импортирует: он загружается в процессах пула GraphRenderer при первом графике
+
+
+def smooth_line(
+    x: Union[np.ndarray, list], y: Union[np.ndarray, list], num_points: int = 300
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Функция выполняет кубическую интерполяцию (сплайн) для сглаживания линий.
+
+    :param x: Набор исходных значений по оси X (список или массив NumPy).
+    :param y: Набор исходных значений по оси Y (список или массив NumPy).
+    :param num_points: Количество точек, до которого нужно расширить/интерполировать данные.
+    :return: Кортеж из двух массивов NumPy (x_new, y_smooth), где:
+             - x_new: Новый набор точек по оси X,
+             - y_smooth: Интерполированные (сглаженные) значения по оси Y.
+    """
+    x_array = np.array(x, dtype=float)
+    y_array = np.array(y, dtype=float)
+
+    x_new = np.linspace(x_array.min(), x_array.max(), num_points)
+    spl = make_interp_spline(x_array, y_array, k=3)  # Кубический сплайн
+    y_smooth = spl(x_new)
+    return x_new, y_smooth
+
+
+def generate_plot(data: Tuple[int, DailyCounts, str, Dict]) -> str:
+    """
+    Генерирует и сохраняет график, показывающий динамику сообщений по датам и удалённых (спам) сообщений.
+    Рисует через объектный API Agg без pyplot, поэтому не зависит от глобального
+    состояния и безопасно выполняется в процессах пула.
+
+    :param data: Кортеж вида (chat_id, daily_counts, file_path, options), где:
+                 - chat_id: Идентификатор чата (целое число),
+                 - daily_counts: Список кортежей (день в формате YYYY-MM-DD, всего сообщений,
+                   из них спама), посчитанных в SQL,
+                 - file_path: Путь, по которому следует сохранить итоговый график,
+                 - options: Параметры отрисовки (см. GRAPH_OPTIONS).
+    :return: Путь к сохранённому графику (строка).
+    """
+    chat_id, daily_counts, file_path, options = data
+
+    # Количество сообщений по дням (дни уже сгруппированы и отсортированы запросом)
+    daily_messages: Dict[date, int] = {}
+    daily_deleted_messages: Dict[date, int] = {}
+    for day, total, spam in daily_counts:
+        d = date.fromisoformat(day)
+        daily_messages[d] = total
+        if spam:
+            daily_deleted_messages[d] = spam
+
+    # Преобразуем даты в числовой формат для графика
+    dates_numeric = date2num(list(daily_messages.keys()))
+    deleted_dates_numeric = date2num(list(daily_deleted_messages.keys()))
+
+    # Построение графика (стиль применяется при создании фигуры и при сохранении)
+    with matplotlib.style.context(options["style"]):
+        fig = Figure(figsize=options["figsize"])
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+
+        ax.plot(
+            dates_numeric,
+            list(daily_messages.values()),
+            label="Всего сообщений",
+        )
+        ax.plot(
+            deleted_dates_numeric,
+            list(daily_deleted_messages.values()),
+            label="Удалено сообщений",
+        )
+
+        # Настройки графика
+        ax.set_title(f"Статистика для чата {chat_id} за всё время", fontsize=20)
+        ax.set_xlabel("Дата", fontsize=16)
+        ax.set_ylabel("Количество", fontsize=16)
+        ax.legend(fontsize=12)
+        ax.grid(axis="y", linestyle="--", alpha=0.85)
+        ax.xaxis.set_major_locator(MaxNLocator(10))
+
+        # Форматирование оси X
+        date_formatter = DateFormatter("%Y-%m-%d")
+        ax.xaxis.set_major_formatter(date_formatter)
+        ax.tick_params(axis="x", labelrotation=45)
+
+        # Сохранение графика: пишем во временный файл и переименовываем, чтобы
+        # никто не получил из кэша недописанный файл
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        fig.savefig(tmp_path, dpi=options["dpi"], format="png")
+        os.replace(tmp_path, file_path)
+
+    return file_path
+
+
+def generate_dashboard(
+    data: Tuple[DashboardRows, List[str], str, Dict],
+) -> str:
+    """
+    Генерирует обзорный график по нескольким чатам: сообщения и спам за период
+    (столбцы по чатам) и доля спама по дням (тепловая карта).
+
+    :param data: Кортеж вида (rows, days, file_path, options), где:
+                 - rows: Список кортежей (chat_id, название, день YYYY-MM-DD, всего
+                   сообщений, из них спама) в порядке убывания активности чата,
+                 - days: Дни периода (YYYY-MM-DD) по возрастанию — столбцы тепловой карты,
+                 - file_path: Путь, по которому следует сохранить итоговый график,
+                 - options: Параметры отрисовки (см. GRAPH_OPTIONS).
+    :return: Путь к сохранённому графику (строка).
+    """
+    rows, days, file_path, options = data
+
+    # Чаты в порядке строк запроса (самые активные сверху) и их подписи
+    labels: Dict[int, str] = {}
+    for chat_id, title, *_ in rows:
+        if chat_id not in labels:
+            label = title or str(chat_id)
+            labels[chat_id] = label if len(label) <= 30 else label[:29] + "…"
+    chat_index = {chat_id: i for i, chat_id in enumerate(labels)}
+    day_index = {day: i for i, day in enumerate(days)}
+
+    totals = np.zeros((len(labels), len(days)))
+    spam = np.zeros((len(labels), len(days)))
+    for chat_id, _, day, total, spam_count in rows:
+        if day in day_index:
+            totals[chat_index[chat_id], day_index[day]] = total
+            spam[chat_index[chat_id], day_index[day]] = spam_count
+    # Доля спама; дни без сообщений остаются пустыми
+    ratio = np.divide(spam, totals, out=np.full_like(totals, np.nan), where=totals > 0)
+
+    with matplotlib.style.context(options["style"]):
+        fig = Figure(figsize=options["figsize"], layout="constrained")
+        FigureCanvasAgg(fig)
+        bars_ax, heat_ax = fig.subplots(1, 2, width_ratios=[1, 2], sharey=True)
+
+        positions = np.arange(len(labels))
+        period_totals = totals.sum(axis=1)
+        period_spam = spam.sum(axis=1)
+        bars_ax.barh(positions, period_totals - period_spam, label="Без спама")
+        bars_ax.barh(
+            positions, period_spam, left=period_totals - period_spam, label="Спам"
+        )
+        bars_ax.set_yticks(positions, list(labels.values()), fontsize=12)
+        bars_ax.invert_yaxis()
+        bars_ax.set_xlabel("Сообщений за период", fontsize=16)
+        bars_ax.legend(fontsize=12)
+        bars_ax.grid(axis="x", linestyle="--", alpha=0.85)
+
+        image = heat_ax.imshow(
+            ratio,
+            aspect="auto",
+            # Дни без сообщений выделяются серым, чтобы не путать их с днями без спама
+            cmap=matplotlib.colormaps["magma"].with_extremes(bad="#333333"),
+            vmin=0,
+            vmax=1,
+            interpolation="nearest",
+        )
+        step = max(1, len(days) // 10)
+        heat_ax.set_xticks(range(0, len(days), step), days[::step])
+        heat_ax.tick_params(axis="x", labelrotation=45)
+        heat_ax.set_xlabel("Дата", fontsize=16)
+        fig.colorbar(image, ax=heat_ax, label="Доля спама")
+
+        fig.suptitle(
+            f"Топ-{len(labels)} чатов за {len(days)} дн. ({days[0]} — {days[-1]})",
+            fontsize=20,
+        )
+
+        # Сохранение графика: пишем во временный файл и переименовываем, чтобы
+        # никто не получил из кэша недописанный файл
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        fig.savefig(tmp_path, dpi=options["dpi"], format="png")
+        os.replace(tmp_path, file_path)
+
+    return file_path
@@ -6,6 +6,7 @@ from src.functions.callbacks import (
     autoclean_settings_callback,
     back_to_main_callback,
     ban_user_callback,
+    ban_wave_callback,
     cancel_add_word_callback,
     cancel_callback,
     delete_callback,
@@ -19,6 +20,7 @@ from src.functions.callbacks import (
     stats_graph_callback,
     toggle_autoclean_callback,
     thank_me,
+    unban_user_callback,
 )
 from src.setup_bot import bot
 from src.filters import is_admin
@@ -38,7 +40,7 @@ def setup_callbacks():
     )
     bot.add_handler(
         CallbackQueryHandler(
-            delete_word_handler, filters.regex(r"^del_word_$") & is_admin
+            delete_word_handler, filters.regex(r"^del_word_") & is_admin
         )
     )
 
@@ -48,6 +50,19 @@ def setup_callbacks():
         )
     )
 
+    bot.add_handler(
+        CallbackQueryHandler(
+            unban_user_callback,
+            filters.regex(r"^unban_user_(\d+)_(\d+)$") & is_admin,
+        )
+    )
+
+    bot.add_handler(
+        CallbackQueryHandler(
+            ban_wave_callback, filters.regex(r"^ban_wave_([0-9a-f]+)$") & is_admin
+        )
+    )
+
     bot.add_handler(
         CallbackQueryHandler(
             add_badword_callback, filters.regex(r"add_badword") & is_admin
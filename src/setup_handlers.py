@@ -1,12 +1,16 @@
 from pyrogram import filters
+from pyrogram.handlers.chat_member_updated_handler import ChatMemberUpdatedHandler
 from pyrogram.handlers.message_handler import MessageHandler
-from src.filters import is_admin
+from src.filters import is_admin, is_global_admin
 from src.functions.functions import (
     add_autos,
+    cache_stats,
+    dashboard,
     get_autos,
     get_commons,
     get_stats,
     menu_command,
+    on_chat_member_updated,
     on_new_member,
     remove_autos,
     set_threshold,
@@ -27,6 +31,7 @@ from app import bot
 def setup_handlers():
     bot.add_handler(MessageHandler(postbot_filter, filters.text & filters.via_bot))
     bot.add_handler(MessageHandler(on_new_member, filters.new_chat_members))
+    bot.add_handler(ChatMemberUpdatedHandler(on_chat_member_updated))
     bot.add_handler(MessageHandler(get_stats, filters.command(["stats"])))
     bot.add_handler(MessageHandler(leave_chat, filters.command(["leave"])))
     bot.add_handler(MessageHandler(start, filters.text & filters.command(["start"])))
@@ -52,6 +57,17 @@ def setup_handlers():
             gen_regex, filters.text & filters.command(["gen_regex"]) & is_admin
         )
     )
+    bot.add_handler(
+        MessageHandler(
+            cache_stats, filters.text & filters.command(["cache_stats"]) & is_admin
+        )
+    )
+    bot.add_handler(
+        MessageHandler(
+            dashboard,
+            filters.text & filters.command(["dashboard"]) & is_global_admin,
+        )
+    )
     bot.add_handler(
         MessageHandler(
             list_command, filters.text & filters.command(["list"]) & is_admin
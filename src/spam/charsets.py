@@ -0,0 +1,152 @@
+import re
+from bisect import bisect_right
+from collections import Counter
+from functools import cached_property, lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Отсортированная таблица непересекающихся диапазонов кодовых точек:
+# (начало, конец включительно, имя блока, письменность)
+CODEPOINT_RANGES: List[Tuple[int, int, str, str]] = [
+    (0x0041, 0x005A, "basic_latin", "latin"),
+    (0x0061, 0x007A, "basic_latin", "latin"),
+    (0x00C0, 0x00FF, "latin_1_supplement", "latin"),
+    (0x0100, 0x017F, "latin_extended_a", "latin"),
+    (0x0180, 0x024F, "latin_extended_b", "latin"),  # Расширенная латиница
+    (0x0250, 0x02AF, "ipa_extensions", "latin"),
+    (0x0370, 0x03FF, "greek", "greek"),
+    (0x0400, 0x04FF, "cyrillic", "cyrillic"),
+    (0x0500, 0x052F, "cyrillic_supplement", "cyrillic"),  # Доп. символы Кириллицы
+    (0x1100, 0x11FF, "hangul_jamo", "hangul"),  # Корейские символы (Hangul)
+    (0x1D00, 0x1D7F, "phonetic_extensions", "latin"),  # Фонетические символы
+    (0x1E00, 0x1EFF, "latin_extended_additional", "latin"),  # Доп. формы латиницы
+    (0xFF00, 0xFFEF, "halfwidth_fullwidth", "fullwidth"),  # Полуширина и полноширина
+]
+
+# Блоки, наличие символов из которых считается признаком спама (+2 к score за блок)
+SUSPICIOUS_BLOCKS = (
+    "cyrillic_supplement",
+    "latin_extended_b",
+    "phonetic_extensions",
+    "latin_extended_additional",
+    "hangul_jamo",
+    "halfwidth_fullwidth",
+)
+
+_RANGE_STARTS = [start for start, _, _, _ in CODEPOINT_RANGES]
+
+# Один класс символов на все подозрительные блоки: текст просматривается один раз,
+# а по таблице диапазонов классифицируются только найденные символы
+_SUSPICIOUS_CHARS = re.compile(
+    "["
+    + "".join(
+        f"\\u{start:04x}-\\u{end:04x}"
+        for start, end, block, _ in CODEPOINT_RANGES
+        if block in SUSPICIOUS_BLOCKS
+    )
+    + "]"
+)
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=4096)
+def classify_char(ch: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Определяет блок Юникода и письменность символа по таблице CODEPOINT_RANGES.
+
+    :param ch: Один символ.
+    :return: Кортеж (имя блока, письменность) или (None, None), если символ не отслеживается.
+    """
+    codepoint = ord(ch)
+    index = bisect_right(_RANGE_STARTS, codepoint) - 1
+    if index >= 0:
+        start, end, block, script = CODEPOINT_RANGES[index]
+        if codepoint <= end:
+            return block, script
+    return None, None
+
+
+class ScriptProfile:
+    """
+    Сводка по символам сообщения. Количество символов в подозрительных блоках считается
+    сразу, статистика по письменностям — только при первом обращении к ней.
+    """
+
+    def __init__(self, text: str = "") -> None:
+        """
+        :param text: Исходный текст сообщения.
+        """
+        self.text = text
+        self.blocks: Dict[str, int] = {}
+        for ch, count in Counter(_SUSPICIOUS_CHARS.findall(text)).items():
+            block, _ = classify_char(ch)
+            self.blocks[block] = self.blocks.get(block, 0) + count
+
+    @property
+    def suspicious_blocks(self) -> List[str]:
+        """
+        Список подозрительных блоков, символы из которых встретились в тексте.
+        """
+        return [block for block in SUSPICIOUS_BLOCKS if self.blocks.get(block)]
+
+    @cached_property
+    def scripts(self) -> Dict[str, int]:
+        """
+        Количество букв каждой письменности (latin, cyrillic, ...).
+        """
+        scripts: Dict[str, int] = {}
+        for ch, count in Counter(self.text).items():
+            _, script = classify_char(ch)
+            if script is not None and ch.isalpha():
+                scripts[script] = scripts.get(script, 0) + count
+        return scripts
+
+    @property
+    def letters(self) -> int:
+        """
+        Общее количество букв из отслеживаемых письменностей.
+        """
+        return sum(self.scripts.values())
+
+    def script_ratio(self, script: str) -> float:
+        """
+        Доля букв указанной письменности среди всех отслеживаемых букв.
+
+        :param script: Имя письменности (например, "cyrillic").
+        :return: Число от 0 до 1.
+        """
+        letters = self.letters
+        return self.scripts.get(script, 0) / letters if letters else 0.0
+
+    @cached_property
+    def mixed_words(self) -> Tuple[int, int]:
+        """
+        Кортеж (всего слов, слов со смешением латиницы и кириллицы, как в "пpивeт").
+        Слова разбираются только если в тексте есть обе письменности.
+        """
+        if not (self.scripts.get("latin") and self.scripts.get("cyrillic")):
+            return 0, 0
+        words = _WORD_PATTERN.findall(self.text)
+        mixed = 0
+        for word in words:
+            scripts = {classify_char(ch)[1] for ch in word}
+            if "latin" in scripts and "cyrillic" in scripts:
+                mixed += 1
+        return len(words), mixed
+
+    @property
+    def mixed_ratio(self) -> float:
+        """
+        Доля слов, в которых латиница смешана с кириллицей.
+        """
+        words, mixed = self.mixed_words
+        return mixed / words if words else 0.0
+
+
+def profile_text(text: str) -> ScriptProfile:
+    """
+    Строит ScriptProfile для текста.
+
+    :param text: Исходный текст сообщения.
+    :return: Объект ScriptProfile.
+    """
+    return ScriptProfile(text)
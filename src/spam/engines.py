@@ -0,0 +1,284 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Совпадение в тексте: (начало, конец) в индексах исходной строки
+Span = Tuple[int, int]
+
+# Символы, которые имеют специальное значение в регулярных выражениях вне экранирования
+_REGEX_METACHARS = frozenset(".^$*+?{}[]|()")
+
+
+def escape_literal(word: str) -> str:
+    """
+    Переводит запись bad_words.txt в синтаксис регулярных выражений. Записи файла —
+    обычный текст: экранируется всё, кроме пробела, который означает любой пробельный
+    символ (\\s).
+
+    :param word: Запись файла в нижнем регистре.
+    :return: Паттерн, который ищет запись как текст.
+    """
+    return r"\s".join(map(re.escape, word.split(" ")))
+
+
+def literal_or_none(word: str) -> Optional[str]:
+    """
+    Проверяет, является ли запись списка запрещённых слов обычным словом, а не регуляркой.
+    Экранированные символы (например, результат re.escape) считаются литералами.
+
+    :param word: Запись из bad_words.txt или chat_badwords.
+    :return: Строка-литерал без экранирования, либо None, если это настоящая регулярка.
+    """
+    chars = []
+    escaped = False
+    for ch in word:
+        if escaped:
+            # \s, \d, \b и т.п. — это классы/якоря, а не буквальные символы
+            if ch.isalnum():
+                return None
+            chars.append(ch)
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch in _REGEX_METACHARS:
+            return None
+        else:
+            chars.append(ch)
+    if escaped:
+        return None
+    return "".join(chars)
+
+
+def is_valid_pattern(pattern: str) -> bool:
+    """
+    Проверяет, компилируется ли строка как регулярное выражение.
+    """
+    try:
+        re.compile(pattern)
+        return True
+    except re.error:
+        return False
+
+
+def is_word_char(ch: str) -> bool:
+    """
+    Аналог класса \\w из модуля re для одного символа.
+    """
+    return ch.isalnum() or ch == "_"
+
+
+def is_word_bounded(text: str, start: int, end: int) -> bool:
+    """
+    Проверяет, что совпадение [start, end) окружено границами слова (как \\b...\\b в re).
+    """
+    if start >= end:
+        return False
+    before = start > 0 and is_word_char(text[start - 1])
+    after = end < len(text) and is_word_char(text[end])
+    return before != is_word_char(text[start]) and after != is_word_char(text[end - 1])
+
+
+def fold_case(text: str) -> str:
+    """
+    Приводит текст к нижнему регистру, сохраняя длину строки, чтобы индексы совпадений
+    в приведённом тексте совпадали с индексами в исходном.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch.lower()[:1] for ch in text)
+
+
+def select_spans(candidates: Iterable[Span]) -> List[Span]:
+    """
+    Выбирает непересекающиеся совпадения по правилу "самое левое, затем самое длинное",
+    так же как это делает re.finditer для альтернативы, отсортированной по длине.
+
+    :param candidates: Все найденные совпадения (могут пересекаться).
+    :return: Отсортированный список непересекающихся совпадений.
+    """
+    selected: List[Span] = []
+    position = 0
+    for start, end in sorted(candidates, key=lambda span: (span[0], -span[1])):
+        if start >= position and end > start:
+            selected.append((start, end))
+            position = end
+    return selected
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо-Корасик для поиска множества строк-литералов за один линейный проход по тексту.
+    """
+
+    __slots__ = ("_goto", "_fail", "_out")
+
+    def __init__(self, words: Iterable[str]) -> None:
+        """
+        :param words: Литералы для поиска (пустые строки игнорируются).
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for word in words:
+            if word:
+                self._insert(word)
+        self._build_failure_links()
+
+    def _insert(self, word: str) -> None:
+        state = 0
+        for ch in word:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        if len(word) not in self._out[state]:
+            self._out[state] += (len(word),)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Span]:
+        """
+        Находит все (в том числе пересекающиеся) вхождения литералов в тексте.
+
+        :param text: Текст для поиска.
+        :return: Список совпадений (начало, конец).
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        spans: List[Span] = []
+        state = 0
+        for index, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                end = index + 1
+                spans.extend((end - length, end) for length in out[state])
+        return spans
+
+
+class RegexEngine:
+    """
+    Движок на основе одной большой альтернативы (a|b|c|...) модуля re.
+    """
+
+    __slots__ = ("_pattern", "_bounded_pattern")
+
+    def __init__(self, patterns: List[str]) -> None:
+        """
+        :param patterns: Регулярные выражения (уже экранированные, если это литералы).
+        """
+        self._pattern: Optional[re.Pattern] = None
+        self._bounded_pattern: Optional[re.Pattern] = None
+        if patterns:
+            alternation = "|".join(patterns)
+            self._pattern = re.compile(f"(?:{alternation})")
+            self._bounded_pattern = re.compile(rf"\b(?:{alternation})\b")
+
+    def find_all(self, text: str, whole_words: bool = False) -> List[Span]:
+        """
+        :param text: Текст для поиска (в нижнем регистре).
+        :param whole_words: Искать только целые слова (\\b...\\b).
+        :return: Список непересекающихся совпадений.
+        """
+        pattern = self._bounded_pattern if whole_words else self._pattern
+        if pattern is None:
+            return []
+        return [
+            match.span()
+            for match in pattern.finditer(text)
+            if match.end() > match.start()
+        ]
+
+
+class HybridEngine:
+    """
+    Литералы ищутся автоматом Ахо-Корасик, настоящие регулярки — через re.
+    """
+
+    __slots__ = ("_automaton", "_regex")
+
+    def __init__(self, keywords: List[str]) -> None:
+        """
+        :param keywords: Записи списка запрещённых слов в синтаксисе регулярных выражений
+                         (литералы экранированы).
+        """
+        literals: List[str] = []
+        patterns: List[str] = []
+        for word in keywords:
+            literal = literal_or_none(word)
+            if literal is None and not is_valid_pattern(word):
+                # Битая регулярка ищется как обычная строка
+                literal = word
+            if literal is None:
+                patterns.append(word)
+            elif literal:
+                literals.append(literal)
+        self._automaton = AhoCorasick(literals) if literals else None
+        self._regex = RegexEngine(patterns)
+
+    def find_all(self, text: str, whole_words: bool = False) -> List[Span]:
+        """
+        :param text: Текст для поиска (в нижнем регистре).
+        :param whole_words: Искать только целые слова (\\b...\\b).
+        :return: Список непересекающихся совпадений.
+        """
+        candidates = self._regex.find_all(text, whole_words)
+        if self._automaton is not None:
+            literal_spans = self._automaton.find_all(text)
+            if whole_words:
+                literal_spans = [
+                    (start, end)
+                    for start, end in literal_spans
+                    if is_word_bounded(text, start, end)
+                ]
+            candidates.extend(literal_spans)
+        return select_spans(candidates)
+
+
+class LegacyRegexEngine:
+    """
+    Прежнее поведение: все записи объединяются в одну альтернативу re.
+    Оставлен для сравнения производительности и отката.
+    """
+
+    __slots__ = ("_regex",)
+
+    def __init__(self, keywords: List[str]) -> None:
+        self._regex = RegexEngine(keywords)
+
+    def find_all(self, text: str, whole_words: bool = False) -> List[Span]:
+        return self._regex.find_all(text, whole_words)
+
+
+ENGINES = {
+    "hybrid": HybridEngine,
+    "regex": LegacyRegexEngine,
+}
+
+
+def build_engine(keywords: List[str], engine: str = "hybrid"):
+    """
+    Создаёт движок поиска запрещённых слов по имени.
+
+    :param keywords: Записи списка запрещённых слов.
+    :param engine: Имя движка из ENGINES ("hybrid" или "regex").
+    :return: Объект движка с методом find_all(text, whole_words).
+    """
+    return ENGINES[engine](keywords)
@@ -0,0 +1,326 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from src.database import adb, db
+from src.spam.engines import (
+    Span,
+    build_engine,
+    escape_literal,
+    is_valid_pattern,
+    literal_or_none,
+    select_spans,
+)
+from src.spam.normalization import transliterate
+from src.spam.regex_safety import regex_guard
+from src.utils.logger_config import logger
+
+
+def wrap_spans(text: str, spans: List[Span]) -> str:
+    """
+    Оборачивает указанные участки текста в тэги < >.
+
+    :param text: Исходный текст.
+    :param spans: Непересекающиеся отсортированные участки (начало, конец).
+    :return: Текст с выделенными участками.
+    """
+    parts = []
+    position = 0
+    for start, end in spans:
+        parts.append(text[position:start])
+        parts.append(f"<{text[start:end]}>")
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+class KeywordMatcher:
+    """
+    Скомпилированный набор запрещённых слов одного чата (глобальный список + слова чата).
+    Собирается один раз и переиспользуется для всех сообщений, пока набор слов не изменится.
+    Регулярки, добавленные администраторами чата, выполняются через regex_guard
+    с ограничением времени.
+    """
+
+    __slots__ = ("keywords", "engine", "guarded", "on_timeout")
+
+    def __init__(
+        self,
+        keywords: List[str],
+        engine: str = "hybrid",
+        guarded: Optional[List[str]] = None,
+        on_timeout: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """
+        :param keywords: Список уникальных запрещённых слов (в нижнем регистре).
+        :param engine: Имя движка поиска (см. src.spam.engines.ENGINES).
+        :param guarded: Недоверенные регулярки из keywords, выполняемые с ограничением времени.
+        :param on_timeout: Вызывается с паттерном, который не уложился в лимит времени.
+        """
+        self.keywords = keywords
+        self.guarded = guarded or []
+        self.on_timeout = on_timeout
+        excluded = set(self.guarded)
+        self.engine = build_engine(
+            [word for word in keywords if word not in excluded], engine
+        )
+
+    def find(self, normalized_text: str) -> List[Span]:
+        """
+        Находит вхождения запрещённых слов в нормализованном тексте.
+
+        :param normalized_text: Текст после unidecode и приведения к нижнему регистру.
+        :return: Список непересекающихся совпадений (начало, конец).
+        """
+        spans = self.engine.find_all(normalized_text)
+        if not self.guarded:
+            return spans
+        guarded_spans, timed_out = regex_guard.find_all(self.guarded, normalized_text)
+        if self.on_timeout is not None:
+            for pattern in timed_out:
+                self.on_timeout(pattern)
+        return select_spans(spans + guarded_spans)
+
+
+class GlobalWordList:
+    """
+    Глобальный список запрещённых слов из файла, загруженный в память.
+    Файл перечитывается только при изменении его mtime или размера, причём проверка
+    выполняется не чаще одного раза в check_interval секунд. Новый список подменяет
+    старый целиком одним присваиванием, поэтому читатели никогда не видят его частично.
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0) -> None:
+        """
+        :param path: Путь к файлу со словами (по одному на строку).
+        :param check_interval: Минимальный интервал между проверками файла, в секундах.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        # (версия, слова) — меняются только вместе
+        self._snapshot: Tuple[int, FrozenSet[str]] = (0, frozenset())
+        self._file_state: Optional[Tuple[int, int]] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(line: str) -> str:
+        """
+        Приводит строку файла к виду, в котором слово хранится в памяти: записи файла —
+        обычный текст, поэтому они экранируются (см. escape_literal) и, в отличие от
+        регулярок чата, никогда не выполняются как регулярные выражения.
+        """
+        return escape_literal(transliterate(line.lower()).strip())
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _reload(self, file_state: Optional[Tuple[int, int]]) -> None:
+        words: FrozenSet[str] = frozenset()
+        if file_state is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    words = frozenset(filter(None, map(self.normalize, f)))
+            except Exception as e:
+                logger.error(f"Error reading keywords: {e}")
+                return
+        self._file_state = file_state
+        self._snapshot = (self._snapshot[0] + 1, words)
+        logger.info(f"Загружено {len(words)} запрещённых слов из {self.path}")
+
+    def snapshot(self) -> Tuple[int, FrozenSet[str]]:
+        """
+        Возвращает текущую версию и набор слов, при необходимости перечитав файл.
+
+        :return: Кортеж (версия, слова).
+        """
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if (
+                    self._checked_at is None
+                    or now - self._checked_at >= self.check_interval
+                ):
+                    file_state = self._stat()
+                    if self._checked_at is None or file_state != self._file_state:
+                        self._reload(file_state)
+                    self._checked_at = now
+        return self._snapshot
+
+    def add(self, word: str) -> None:
+        """
+        Дописывает слово в файл и сразу добавляет его в список в памяти, не перечитывая файл.
+
+        :param word: Новое запрещённое слово.
+        :return: None
+        """
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"\n{transliterate(word.lower())}")
+            normalized = self.normalize(word)
+            version, words = self._snapshot
+            if normalized and normalized not in words:
+                self._snapshot = (version + 1, words | {normalized})
+            self._file_state = self._stat()
+
+    def invalidate(self) -> None:
+        """
+        Заставляет перечитать файл при следующем обращении.
+        """
+        with self._lock:
+            self._checked_at = None
+
+
+class KeywordRegistry:
+    """
+    Реестр скомпилированных матчеров запрещённых слов по chat_id.
+    Матчер пересобирается только при изменении набора слов: глобального
+    (bad_words.txt) или списка конкретного чата (версия из Database).
+    Слова чата загружаются через adb методом load до проверки сообщения, поэтому
+    get не обращается к базе и не блокирует цикл событий.
+    Регулярки чата, которые strike_limit раз превысили лимит времени, отправляются
+    в карантин и больше не выполняются.
+    """
+
+    def __init__(
+        self,
+        words_file: str = "bad_words.txt",
+        engine: str = "hybrid",
+        strike_limit: int = 3,
+    ) -> None:
+        """
+        :param words_file: Путь к файлу с глобальным списком запрещённых слов.
+        :param engine: Имя движка поиска для всех матчеров реестра.
+        :param strike_limit: Сколько превышений лимита времени допускается до карантина.
+        """
+        self.global_words = GlobalWordList(words_file)
+        self.engine = engine
+        self.strike_limit = strike_limit
+        self._matchers: Dict[Optional[int], Tuple[Tuple[int, int], KeywordMatcher]] = {}
+        # chat_id -> (версия из Database, слова чата), загруженные методом load
+        self._chat_words: Dict[int, Tuple[int, FrozenSet[str]]] = {}
+        self._strikes: Dict[Tuple[int, str], int] = {}
+        # Паттерны, отправленные в карантин, о которых ещё не сообщили в чат
+        self._quarantined: List[Tuple[int, str]] = []
+
+    async def load(self, chat_id: Optional[int] = None) -> None:
+        """
+        Загружает слова чата через adb (в потоке чтения БД), если с прошлой загрузки
+        список чата изменился. Вызывается перед проверкой сообщения.
+
+        :param chat_id: Идентификатор чата (None — только глобальный список).
+        :return: None
+        """
+        if not chat_id:
+            return
+        version = db.get_badwords_version(chat_id)
+        loaded = self._chat_words.get(chat_id)
+        if loaded is not None and loaded[0] == version:
+            return
+        words = frozenset(filter(None, await adb.get_chat_badwords(chat_id)))
+        # Если список изменился во время загрузки, версия не совпадёт и следующий
+        # вызов загрузит его снова
+        self._chat_words[chat_id] = (version, words)
+
+    def _loaded(self, chat_id: Optional[int]) -> Tuple[int, FrozenSet[str]]:
+        if not chat_id:
+            return 0, frozenset()
+        return self._chat_words.get(chat_id, (-1, frozenset()))
+
+    def get(self, chat_id: Optional[int] = None) -> KeywordMatcher:
+        """
+        Возвращает матчер для чата, пересобирая его только если набор слов изменился.
+        Использует слова чата, загруженные методом load (до первой загрузки — только
+        глобальный список).
+
+        :param chat_id: Идентификатор чата (None — только глобальный список).
+        :return: Объект KeywordMatcher.
+        """
+        global_version, global_words = self.global_words.snapshot()
+        chat_version, chat_keywords = self._loaded(chat_id)
+        version = (global_version, chat_version)
+        cached = self._matchers.get(chat_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        all_words = global_words.union(chat_keywords)
+        # Слова из bad_words.txt уже экранированы; настоящими регулярками могут быть
+        # только слова чата, которые add_chat_badword принял как валидные паттерны,
+        # и они выполняются с ограничением времени
+        guarded = sorted(
+            word
+            for word in chat_keywords - global_words
+            if literal_or_none(word) is None and is_valid_pattern(word)
+        )
+        # Матчер собирается полностью и только потом подменяет старый
+        matcher = KeywordMatcher(
+            sorted(all_words, key=lambda w: (-len(w), w)),
+            self.engine,
+            guarded,
+            lambda pattern: self.record_timeout(chat_id, pattern),
+        )
+        self._matchers[chat_id] = (version, matcher)
+        return matcher
+
+    def version(self, chat_id: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Версия набора запрещённых слов чата: меняется при любом изменении
+        глобального списка или списка чата.
+
+        :param chat_id: Идентификатор чата (None — только глобальный список).
+        :return: Кортеж (версия глобального списка, версия списка чата).
+        """
+        global_version, _ = self.global_words.snapshot()
+        return global_version, self._loaded(chat_id)[0]
+
+    def invalidate(self, chat_id: Optional[int] = None) -> None:
+        """
+        Сбрасывает кэш. Без chat_id — перечитывает глобальный список для всех чатов,
+        иначе — пересобирает матчер только указанного чата.
+
+        :param chat_id: Идентификатор чата (опционально).
+        :return: None
+        """
+        if chat_id is None:
+            self.global_words.invalidate()
+        else:
+            self._matchers.pop(chat_id, None)
+            self._chat_words.pop(chat_id, None)
+
+    def record_timeout(self, chat_id: int, pattern: str) -> None:
+        """
+        Учитывает превышение лимита времени регуляркой чата и после strike_limit
+        превышений отправляет её в карантин.
+
+        :param chat_id: Идентификатор чата.
+        :param pattern: Паттерн, не уложившийся в лимит.
+        :return: None
+        """
+        key = (chat_id, pattern)
+        strikes = self._strikes.get(key, 0) + 1
+        logger.warning(
+            f"Паттерн {pattern!r} чата {chat_id} превысил лимит времени ({strikes}/{self.strike_limit})"
+        )
+        if strikes < self.strike_limit:
+            self._strikes[key] = strikes
+            return
+        self._strikes.pop(key, None)
+        if db.quarantine_chat_badword(chat_id, pattern):
+            self._quarantined.append(key)
+
+    def pop_quarantined(self) -> List[Tuple[int, str]]:
+        """
+        Возвращает паттерны, отправленные в карантин с прошлого вызова, и очищает список.
+
+        :return: Список кортежей (chat_id, паттерн).
+        """
+        quarantined, self._quarantined = self._quarantined, []
+        return quarantined
+
+
+keyword_registry = KeywordRegistry("bad_words.txt")
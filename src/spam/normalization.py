@@ -0,0 +1,134 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import unidecode
+
+from src.spam.engines import Span, fold_case
+
+# Диапазоны, из которых в спаме берут похожие на латиницу символы: латиница с диакритикой,
+# греческий, кириллица, фонетические знаки, типографская пунктуация, полноширинные
+# формы и "математические" буквы вида 𝐟𝐫𝐞𝐞
+CONFUSABLE_RANGES: List[Tuple[int, int]] = [
+    (0x00A0, 0x02AF),
+    (0x0370, 0x052F),
+    (0x1D00, 0x1DBF),
+    (0x1E00, 0x1EFF),
+    (0x2000, 0x206F),
+    (0x2100, 0x214F),
+    (0xFF00, 0xFFEF),
+    (0x1D400, 0x1D7FF),
+]
+
+# Таблица для str.translate. Значения берутся из самого unidecode, поэтому результат
+# совпадает с unidecode и уже сохранённые списки слов не нужно переделывать
+TRANSLATION_TABLE: Dict[int, str] = {
+    codepoint: unidecode.unidecode(chr(codepoint))
+    for start, end in CONFUSABLE_RANGES
+    for codepoint in range(start, end + 1)
+}
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]+")
+
+# Тексты длиннее этого значения не кэшируются, чтобы кэш не занимал много памяти
+CACHE_MAX_LENGTH = 4096
+
+
+def transliterate(text: str) -> str:
+    """
+    То же, что unidecode.unidecode(text), но ASCII-текст возвращается как есть,
+    а символы из CONFUSABLE_RANGES заменяются одним вызовом str.translate.
+    unidecode вызывается только для оставшихся редких символов (эмодзи и т.п.).
+
+    :param text: Произвольный текст.
+    :return: Текст в ASCII.
+    """
+    if text.isascii():
+        return text
+    text = text.translate(TRANSLATION_TABLE)
+    if text.isascii():
+        return text
+    return _NON_ASCII.sub(lambda match: _transliterate_rest(match.group()), text)
+
+
+@lru_cache(maxsize=1024)
+def _transliterate_rest(chars: str) -> str:
+    return unidecode.unidecode(chars)
+
+
+@lru_cache(maxsize=2048)
+def _normalize_cached(text: str) -> str:
+    return transliterate(text.lower().strip())
+
+
+def normalize_text(text: str) -> str:
+    """
+    Нормализует текст сообщения: то же, что unidecode(text.lower().strip()).
+    Результаты для повторяющихся текстов (рассылки спама) берутся из LRU-кэша.
+
+    :param text: Исходный текст сообщения.
+    :return: Нормализованный текст.
+    """
+    if len(text) > CACHE_MAX_LENGTH:
+        return transliterate(text.lower().strip())
+    return _normalize_cached(text)
+
+
+def _normalize_with_offsets(text: str) -> Tuple[str, Sequence[int]]:
+    lowered = fold_case(text)
+    start = len(lowered) - len(lowered.lstrip())
+    end = len(lowered.rstrip())
+
+    if lowered.isascii():
+        return lowered[start:end], range(start, end)
+
+    parts: List[str] = []
+    offsets: List[int] = []
+    for index in range(start, end):
+        ch = lowered[index]
+        if ch.isascii():
+            parts.append(ch)
+            offsets.append(index)
+            continue
+        converted = TRANSLATION_TABLE.get(ord(ch))
+        if converted is None:
+            converted = unidecode.unidecode(ch)
+        parts.append(converted)
+        offsets.extend([index] * len(converted))
+    return "".join(parts), tuple(offsets)
+
+
+_normalize_with_offsets_cached = lru_cache(maxsize=2048)(_normalize_with_offsets)
+
+
+def normalize_with_offsets(text: str) -> Tuple[str, Sequence[int]]:
+    """
+    Нормализует текст так же, как unidecode(text.lower().strip()), но дополнительно
+    запоминает, из какого символа исходного текста получен каждый символ результата.
+    Результаты для повторяющихся текстов берутся из LRU-кэша.
+
+    :param text: Исходный текст сообщения.
+    :return: Кортеж (нормализованный текст, индексы символов в исходном тексте).
+    """
+    if len(text) > CACHE_MAX_LENGTH:
+        return _normalize_with_offsets(text)
+    return _normalize_with_offsets_cached(text)
+
+
+def to_source_spans(spans: List[Span], offsets: Sequence[int]) -> List[Span]:
+    """
+    Переводит участки нормализованного текста в участки исходного текста.
+
+    :param spans: Участки нормализованного текста.
+    :param offsets: Индексы из normalize_with_offsets.
+    :return: Непересекающиеся участки исходного текста.
+    """
+    result: List[Span] = []
+    for start, end in spans:
+        source_start, source_end = offsets[start], offsets[end - 1] + 1
+        if result and source_start < result[-1][1]:
+            # Несколько совпадений внутри одного исходного символа — склеиваем
+            result[-1] = (result[-1][0], max(result[-1][1], source_end))
+        else:
+            result.append((source_start, source_end))
+    return result
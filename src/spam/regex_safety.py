@@ -0,0 +1,160 @@
+import multiprocessing
+import re
+import threading
+from multiprocessing.connection import Connection
+from typing import List, Optional, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants  # type: ignore[no-redef]
+    import sre_parse  # type: ignore[no-redef]
+
+from src.spam.engines import Span
+from src.spam.regex_worker import serve
+from src.utils.processes import worker_context
+
+# Паттерны длиннее этого значения не принимаются: их трудно проверить и отладить
+MAX_PATTERN_LENGTH = 200
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+# Притяжательные квантификаторы (a++) не откатываются, поэтому безопасны
+_POSSESSIVE_REPEAT = getattr(sre_constants, "POSSESSIVE_REPEAT", None)
+_ATOMIC_GROUP = getattr(sre_constants, "ATOMIC_GROUP", None)
+
+
+def _find_in_items(items, repeated: bool) -> Optional[str]:
+    """
+    Обходит разобранное выражение и ищет конструкции с экспоненциальным перебором.
+
+    :param items: Узлы дерева sre_parse.
+    :param repeated: True, если узлы находятся внутри повторяющегося квантификатора.
+    :return: Описание найденной проблемы или None.
+    """
+    for op, av in items:
+        if op in _REPEATS or op == _POSSESSIVE_REPEAT:
+            _, max_count, sub = av
+            repeats = max_count > 1 and op != _POSSESSIVE_REPEAT
+            if repeated and repeats:
+                return "вложенные квантификаторы (например, (a+)+)"
+            reason = _find_in_items(sub, repeated or repeats)
+        elif op == sre_constants.SUBPATTERN:
+            reason = _find_in_items(av[-1], repeated)
+        elif op == sre_constants.BRANCH:
+            reason = next(
+                filter(None, (_find_in_items(branch, repeated) for branch in av[1])),
+                None,
+            )
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            reason = _find_in_items(av[1], repeated)
+        elif op == _ATOMIC_GROUP:
+            reason = _find_in_items(av, False)
+        elif op in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS):
+            reason = "обратные ссылки на группы (\\1)"
+        else:
+            reason = None
+        if reason:
+            return reason
+    return None
+
+
+def find_unsafe_construct(pattern: str) -> Optional[str]:
+    """
+    Статически проверяет регулярное выражение на конструкции, которые могут выполняться
+    экспоненциально долго (ReDoS): вложенные квантификаторы и обратные ссылки.
+    Остальные медленные случаи отсекает ограничение времени в RegexGuard.
+
+    :param pattern: Регулярное выражение (как оно будет сохранено в chat_badwords).
+    :return: Описание проблемы или None, если паттерн безопасен (или не является регуляркой).
+    """
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        return f"паттерн длиннее {MAX_PATTERN_LENGTH} символов"
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, RecursionError):
+        return None
+    return _find_in_items(parsed, False)
+
+
+class RegexGuard:
+    """
+    Выполняет недоверенные регулярки (добавленные администраторами чатов) в отдельном
+    процессе с ограничением времени на каждый паттерн. Если паттерн не уложился в лимит,
+    процесс убивается и перезапускается. find_all ждёт ответа процесса, поэтому
+    вызывается не из цикла событий, а из потока проверки (см. scan_message_async).
+    """
+
+    def __init__(self, timeout: float = 0.05, start_timeout: float = 10.0) -> None:
+        """
+        :param timeout: Лимит времени на выполнение одного паттерна, в секундах.
+        :param start_timeout: Сколько ждать запуска рабочего процесса, в секундах.
+        """
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self._process: Optional[multiprocessing.Process] = None
+        self._connection: Optional[Connection] = None
+        self._lock = threading.Lock()
+        self._context = worker_context()
+
+    def _start(self) -> Connection:
+        if self._connection is None:
+            parent, child = self._context.Pipe()
+            self._process = self._context.Process(
+                target=serve, args=(child,), daemon=True
+            )
+            self._process.start()
+            child.close()
+            self._connection = parent
+            if not parent.poll(self.start_timeout):
+                self._stop()
+                raise TimeoutError("regex worker did not start")
+            parent.recv()
+        return self._connection
+
+    def _stop(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+        if self._connection is not None:
+            self._connection.close()
+        self._process = None
+        self._connection = None
+
+    def find_all(self, patterns: List[str], text: str) -> Tuple[List[Span], List[str]]:
+        """
+        Ищет совпадения всех паттернов в тексте.
+
+        :param patterns: Недоверенные регулярные выражения.
+        :param text: Нормализованный текст сообщения.
+        :return: Кортеж (совпадения, паттерны, превысившие лимит времени).
+        """
+        spans: List[Span] = []
+        timed_out: List[str] = []
+        pending = list(patterns)
+        with self._lock:
+            while pending:
+                connection = self._start()
+                connection.send((pending, text))
+                done = 0
+                for pattern in pending:
+                    if not connection.poll(self.timeout):
+                        timed_out.append(pattern)
+                        self._stop()
+                        done += 1
+                        break
+                    spans.extend(connection.recv())
+                    done += 1
+                else:
+                    break
+                pending = pending[done:]
+        return spans, timed_out
+
+    def close(self) -> None:
+        """
+        Останавливает рабочий процесс.
+        """
+        with self._lock:
+            self._stop()
+
+
+regex_guard = RegexGuard()
@@ -0,0 +1,41 @@
+import re
+from functools import lru_cache
+from multiprocessing.connection import Connection
+from typing import Optional
+
+# Код рабочего процесса RegexGuard. Модуль намеренно импортирует только стандартную
+# библиотеку: он загружается в отдельном процессе (forkserver/spawn), и там не должны
+# загружаться модули бота и открываться база
+
+
+@lru_cache(maxsize=1024)
+def _compile(pattern: str) -> Optional[re.Pattern]:
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+
+def serve(connection: Connection) -> None:
+    """
+    Цикл рабочего процесса: принимает (паттерны, текст) и отправляет найденные участки
+    отдельно для каждого паттерна, чтобы родитель знал, какой из них завис.
+
+    :param connection: Конец канала, связанный с RegexGuard.
+    :return: None
+    """
+    # Сообщаем о готовности: время запуска процесса не входит в лимит паттернов
+    connection.send(None)
+    while True:
+        try:
+            patterns, text = connection.recv()
+        except (EOFError, OSError):
+            return
+        for pattern in patterns:
+            regex = _compile(pattern)
+            spans = (
+                [m.span() for m in regex.finditer(text) if m.end() > m.start()]
+                if regex is not None
+                else []
+            )
+            connection.send(spans)
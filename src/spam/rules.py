@@ -0,0 +1,189 @@
+import math
+import time
+from functools import cached_property
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.spam.charsets import SUSPICIOUS_BLOCKS, ScriptProfile
+from src.spam.engines import Span
+from src.spam.keywords import keyword_registry
+from src.spam.normalization import normalize_with_offsets, to_source_spans
+from src.spam.suspicious import SUSPICIOUS_RULES, detect_suspicious
+
+
+class ScanContext:
+    """
+    Данные проверяемого сообщения, общие для всех правил. Нормализация текста,
+    профиль символов и поиск запрещённых слов выполняются лениво и не более одного раза.
+    """
+
+    def __init__(self, text: str, chat_id: Optional[int] = None) -> None:
+        """
+        :param text: Исходный текст сообщения.
+        :param chat_id: Идентификатор чата (для списка запрещённых слов чата).
+        """
+        self.text = text
+        self.chat_id = chat_id
+
+    @cached_property
+    def normalized(self) -> Tuple[str, Sequence[int]]:
+        """
+        Нормализованный текст и индексы его символов в исходном тексте.
+        """
+        return normalize_with_offsets(self.text)
+
+    @property
+    def normalized_text(self) -> str:
+        return self.normalized[0]
+
+    @cached_property
+    def profile(self) -> ScriptProfile:
+        """
+        Сводка по блокам Юникода и письменностям исходного текста.
+        """
+        return ScriptProfile(self.text)
+
+    @cached_property
+    def keyword_spans(self) -> List[Span]:
+        """
+        Вхождения запрещённых слов в нормализованном тексте.
+        """
+        return keyword_registry.get(self.chat_id).find(self.normalized_text)
+
+    @property
+    def keywords_searched(self) -> bool:
+        """
+        True, если поиск запрещённых слов уже выполнялся.
+        """
+        return "keyword_spans" in self.__dict__
+
+    @cached_property
+    def source_spans(self) -> List[Span]:
+        """
+        Вхождения запрещённых слов в координатах исходного текста.
+        """
+        return to_source_spans(self.keyword_spans, self.normalized[1])
+
+
+class Rule:
+    """
+    Правило оценки сообщения.
+
+    :cvar name: Имя правила (ключ в ScanResult.hits).
+    :cvar weight: Максимальный балл, который может добавить правило (math.inf — без ограничения).
+    :cvar initial_cost: Оценка стоимости в микросекундах до первых замеров.
+    """
+
+    name = "rule"
+    weight = math.inf
+    initial_cost = 1.0
+
+    def __init__(self) -> None:
+        # Измеренная стоимость правила (экспоненциальное скользящее среднее, мкс)
+        self.cost = self.initial_cost
+        self.calls = 0
+
+    def evaluate(self, context: ScanContext) -> float:
+        """
+        :param context: Данные проверяемого сообщения.
+        :return: Балл, добавляемый правилом.
+        """
+        raise NotImplementedError
+
+    def record_cost(self, elapsed: float, smoothing: float = 0.05) -> None:
+        """
+        Учитывает очередной замер времени выполнения правила.
+
+        :param elapsed: Время выполнения в микросекундах.
+        :param smoothing: Вес нового замера в скользящем среднем.
+        """
+        self.calls += 1
+        self.cost += (elapsed - self.cost) * max(smoothing, 1 / self.calls)
+
+
+class SuspiciousPatternsRule(Rule):
+    """
+    Упоминания рядом с "премиум", "тут" или стрелкой: +5 за каждое сработавшее правило.
+    """
+
+    name = "suspicious"
+    weight = 5 * len(SUSPICIOUS_RULES)
+    initial_cost = 1.0
+
+    def evaluate(self, context: ScanContext) -> float:
+        return 5 * len(detect_suspicious(context.normalized_text))
+
+
+class SpecialCharsRule(Rule):
+    """
+    Символы из подозрительных блоков Юникода: +2 за каждый найденный блок.
+    """
+
+    name = "special_chars"
+    weight = 2 * len(SUSPICIOUS_BLOCKS)
+    initial_cost = 5.0
+
+    def evaluate(self, context: ScanContext) -> float:
+        return 2 * len(context.profile.suspicious_blocks)
+
+
+class KeywordsRule(Rule):
+    """
+    Запрещённые слова: +1 за каждое вхождение.
+    """
+
+    name = "keywords"
+    weight = math.inf
+    initial_cost = 30.0
+
+    def evaluate(self, context: ScanContext) -> float:
+        return len(context.keyword_spans)
+
+
+class RulePipeline:
+    """
+    Набор правил, выполняемых от самого дешёвого к самому дорогому. Проверка
+    прекращается, как только балл достиг порога или оставшиеся правила уже
+    не могут его набрать. В default_pipeline последнее правило (KeywordsRule)
+    не ограничено по весу, поэтому на практике остановка бывает только при достигнутом
+    пороге, а запрещённые слова у такого спама не ищутся и не выделяются.
+    """
+
+    def __init__(self, rules: List[Rule]) -> None:
+        """
+        :param rules: Правила оценки.
+        """
+        self.rules = rules
+
+    def run(
+        self, context: ScanContext, threshold: float
+    ) -> Tuple[float, Dict[str, float], bool]:
+        """
+        Выполняет правила для сообщения.
+
+        :param context: Данные проверяемого сообщения.
+        :param threshold: Порог спама.
+        :return: Кортеж (балл, вклад сработавших правил, были ли выполнены все правила).
+        """
+        rules = sorted(self.rules, key=lambda rule: rule.cost)
+        score = 0.0
+        hits: Dict[str, float] = {}
+
+        for index, rule in enumerate(rules):
+            reachable = score + sum(pending.weight for pending in rules[index:])
+            if score >= threshold or reachable < threshold:
+                return score, hits, False
+
+            started = time.perf_counter()
+            value = rule.evaluate(context)
+            rule.record_cost((time.perf_counter() - started) * 1e6)
+
+            if value:
+                hits[rule.name] = value
+                score += value
+
+        return score, hits, True
+
+
+default_pipeline = RulePipeline(
+    [SuspiciousPatternsRule(), SpecialCharsRule(), KeywordsRule()]
+)
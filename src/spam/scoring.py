@@ -0,0 +1,157 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, Hashable, List, Optional
+
+from src.spam.charsets import ScriptProfile
+from src.spam.engines import Span
+from src.spam.keywords import keyword_registry, wrap_spans
+from src.spam.rules import RulePipeline, ScanContext, default_pipeline
+from src.spam.verdicts import VerdictCache, verdict_cache
+
+# Проверки сообщений в чатах с регулярками администраторов ждут ответа RegexGuard
+# (до его лимита времени на паттерн), поэтому выполняются в отдельном потоке.
+# Один поток: RegexGuard всё равно обслуживает паттерны по очереди
+_guarded_scans = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guarded-scan")
+
+
+@dataclass
+class ScanResult:
+    """
+    Результат однократной проверки сообщения.
+
+    :param score: Набранный балл (при досрочной остановке — балл на момент остановки).
+    :param is_spam: True, если балл достиг порога.
+    :param hits: Вклад каждого сработавшего правила в балл ({имя правила: баллы}).
+    :param complete: True, если были выполнены все правила конвейера.
+    :param context: Данные проверки, из которых лениво берутся участки и профиль символов.
+    """
+
+    score: float = 0
+    is_spam: bool = False
+    hits: Dict[str, float] = field(default_factory=dict)
+    complete: bool = True
+    context: Optional[ScanContext] = field(default=None, repr=False, compare=False)
+
+    @property
+    def spans(self) -> List[Span]:
+        """
+        Участки исходного текста, совпавшие с запрещёнными словами. Если правило
+        запрещённых слов не выполнялось из-за досрочной остановки, список пуст:
+        поиск ради выделения не выполняется.
+        """
+        if self.context is None or not self.context.keywords_searched:
+            return []
+        return self.context.source_spans
+
+    @property
+    def profile(self) -> ScriptProfile:
+        """
+        Сводка по блокам Юникода и письменностям текста.
+        """
+        return self.context.profile if self.context is not None else ScriptProfile()
+
+    def highlight(self, text: str) -> str:
+        """
+        Оборачивает найденные запрещённые слова в тэги < >, не выполняя поиск повторно.
+        Если поиск не выполнялся из-за досрочной остановки, текст возвращается как есть.
+
+        :param text: Исходный текст сообщения, для которого получен результат.
+        :return: Текст с выделенными словами.
+        """
+        spans = self.spans
+        return wrap_spans(text, spans) if spans else text
+
+
+def verdict_key(
+    context: ScanContext, threshold: float, pipeline: RulePipeline
+) -> Hashable:
+    """
+    Ключ кэша вердиктов для сообщения.
+
+    :param context: Данные проверяемого сообщения.
+    :param threshold: Порог спама.
+    :param pipeline: Конвейер правил.
+    :return: Ключ записи VerdictCache.
+    """
+    # Подозрительные блоки Юникода теряются при нормализации ("ｆｒｅｅ" -> "free"),
+    # поэтому входят в ключ вместе с хэшем нормализованного текста
+    return (
+        hash(context.normalized_text),
+        keyword_registry.version(context.chat_id),
+        tuple(context.profile.suspicious_blocks),
+        threshold,
+        id(pipeline),
+    )
+
+
+def scan_message(
+    text: str,
+    chat_id: Optional[int] = None,
+    threshold: float = 2.0,
+    pipeline: RulePipeline = default_pipeline,
+    cache: Optional[VerdictCache] = verdict_cache,
+) -> ScanResult:
+    """
+    Проверяет сообщение конвейером правил: от дешёвых к дорогим, с остановкой, как только
+    исход ясен. Найденные запрещённые слова запоминаются для последующего выделения.
+    Повторы уже проверенного текста получают вердикт из кэша без повторной проверки.
+
+    :param text: Текст сообщения.
+    :param chat_id: Идентификатор чата для использования его списка запрещённых слов.
+    :param threshold: Порог, начиная с которого сообщение считается спамом.
+    :param pipeline: Конвейер правил (по умолчанию default_pipeline).
+    :param cache: Кэш вердиктов (None — не использовать).
+    :return: Объект ScanResult.
+    """
+    context = ScanContext(text, chat_id)
+    if cache is None:
+        score, hits, complete = pipeline.run(context, threshold)
+    else:
+        key = verdict_key(context, threshold, pipeline)
+        verdict = cache.get(key)
+        if verdict is None:
+            score, hits, complete = pipeline.run(context, threshold)
+            spans = (
+                tuple(context.keyword_spans) if context.keywords_searched else None
+            )
+            cache.put(key, (score, hits, complete, spans))
+        else:
+            score, hits, complete, spans = verdict
+            hits = dict(hits)
+            if spans is not None:
+                context.keyword_spans = list(spans)
+    return ScanResult(
+        score=score,
+        is_spam=score >= threshold,
+        hits=hits,
+        complete=complete,
+        context=context,
+    )
+
+
+async def scan_message_async(
+    text: str,
+    chat_id: Optional[int] = None,
+    threshold: float = 2.0,
+    pipeline: RulePipeline = default_pipeline,
+    cache: Optional[VerdictCache] = verdict_cache,
+) -> ScanResult:
+    """
+    То же, что scan_message, но для вызова из цикла событий: если в чате есть регулярки
+    администраторов, проверка выполняется в отдельном потоке, чтобы ожидание RegexGuard
+    не останавливало обработку сообщений других чатов.
+
+    :param text: Текст сообщения.
+    :param chat_id: Идентификатор чата для использования его списка запрещённых слов.
+    :param threshold: Порог, начиная с которого сообщение считается спамом.
+    :param pipeline: Конвейер правил (по умолчанию default_pipeline).
+    :param cache: Кэш вердиктов (None — не использовать).
+    :return: Объект ScanResult.
+    """
+    scan = partial(scan_message, text, chat_id, threshold, pipeline, cache)
+    if not keyword_registry.get(chat_id).guarded:
+        return scan()
+    return await asyncio.get_running_loop().run_in_executor(_guarded_scans, scan)
+
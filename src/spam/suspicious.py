@@ -0,0 +1,87 @@
+import re
+from typing import List
+
+# Слова-триггеры. Сравниваются без учёта регистра, как в прежних регулярках с re.IGNORECASE
+_TRIGGERS = {
+    "premium": re.compile(r"прем|премиум|premium", re.IGNORECASE),
+    "here": re.compile(r"тут|here", re.IGNORECASE),
+}
+_TRIGGER_LENGTHS = {3, 4, 7}
+
+# Токены: перевод строки, стрелка, "@" перед словом (упоминание) и слова целиком
+_TOKEN_PATTERN = re.compile(r"\n|➡️|@(?=\w)|\w+")
+
+# Имена правил в порядке прежних регулярок:
+#   \b(прем|премиум|premium)\b.*?@\w+   @\w+.*?\b(прем|премиум|premium)\b
+#   \b(тут|here)\b.*?@\w+               @\w+.*?\b(тут|here)\b
+#   ➡️.*?@\w+                           @\w+.*?➡️
+SUSPICIOUS_RULES = (
+    "premium_before_mention",
+    "mention_before_premium",
+    "here_before_mention",
+    "mention_before_here",
+    "arrow_before_mention",
+    "mention_before_arrow",
+)
+
+
+def _trigger_of(word: str) -> str:
+    """
+    Возвращает имя триггера ("premium"/"here"), если слово целиком совпадает с ним, иначе "".
+    """
+    if len(word) in _TRIGGER_LENGTHS:
+        for name, pattern in _TRIGGERS.items():
+            if pattern.fullmatch(word):
+                return name
+    return ""
+
+
+def detect_suspicious(text: str) -> List[str]:
+    """
+    Находит конструкции вида "премиум ... @username", "@username ... тут", "➡️ ... @username"
+    за один линейный проход по токенам. Как и прежние регулярки с ".*?", пара
+    "триггер + упоминание" должна находиться в одной строке.
+
+    :param text: Нормализованный текст сообщения.
+    :return: Имена сработавших правил из SUSPICIOUS_RULES (каждое — +5 к score).
+    """
+    # Все правила требуют упоминания: без "@" текст можно не разбирать
+    if "@" not in text:
+        return []
+
+    found = set()
+    # Что уже встречалось в текущей строке
+    seen = {"premium": False, "here": False, "arrow": False}
+    mentions = 0
+    mention_pending = False
+
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        if token == "\n":
+            seen = {"premium": False, "here": False, "arrow": False}
+            mentions = 0
+            mention_pending = False
+        elif token == "@":
+            for name, before in seen.items():
+                if before:
+                    found.add(f"{name}_before_mention")
+            mention_pending = True
+        elif token == "➡️":
+            seen["arrow"] = True
+            if mentions:
+                found.add("mention_before_arrow")
+        else:
+            trigger = _trigger_of(token)
+            if trigger:
+                seen[trigger] = True
+                # Слово сразу после "@" — часть своего же упоминания, считаются только предыдущие
+                if mentions:
+                    found.add(f"mention_before_{trigger}")
+            if mention_pending:
+                mentions += 1
+                mention_pending = False
+
+        if len(found) == len(SUSPICIOUS_RULES):
+            break
+
+    return [rule for rule in SUSPICIOUS_RULES if rule in found]
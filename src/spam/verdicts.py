@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from src.spam.engines import Span
+
+# Запомненный вердикт: (балл, вклад правил, выполнены ли все правила,
+# участки запрещённых слов в нормализованном тексте или None, если поиск не выполнялся)
+Verdict = Tuple[float, Dict[str, float], bool, Optional[Tuple[Span, ...]]]
+
+
+class VerdictCache:
+    """
+    Ограниченный по размеру и времени жизни кэш вердиктов проверки сообщений.
+    Спам-рассылки присылают один и тот же текст десятки раз, и повторная копия получает
+    балл без повторной проверки. В ключ входит версия набора запрещённых слов чата,
+    поэтому после изменения набора старые записи просто перестают находиться и
+    вытесняются по LRU или по истечении ttl.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 600.0) -> None:
+        """
+        :param maxsize: Максимальное количество записей.
+        :param ttl: Время жизни записи, в секундах.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Verdict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, key: Hashable) -> Optional[Verdict]:
+        """
+        Возвращает вердикт по ключу, если он есть и не устарел.
+
+        :param key: Ключ записи.
+        :return: Вердикт или None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, verdict: Verdict) -> None:
+        """
+        Запоминает вердикт, вытесняя самые давно использованные записи.
+
+        :param key: Ключ записи.
+        :param verdict: Вердикт.
+        :return: None
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, verdict)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def clear(self) -> None:
+        """
+        Удаляет все записи (счётчики сохраняются).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Доля обращений, для которых вердикт нашёлся в кэше.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Счётчики для подбора размера кэша.
+
+        :return: Словарь с размером, попаданиями, промахами, долей попаданий и вытеснениями.
+        """
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+verdict_cache = VerdictCache()
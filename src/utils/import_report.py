@@ -0,0 +1,108 @@
+import builtins
+import sys
+import threading
+import time
+from importlib.util import resolve_name
+from typing import Dict, List, Optional, Tuple
+
+
+class ImportReport:
+    """
+    Замер времени импорта модулей при запуске бота (аналог python -X importtime,
+    но с выводом в лог). На время замера подменяет builtins.__import__ и для каждого
+    впервые загружаемого модуля запоминает полное время (вместе с вложенными
+    импортами) и собственное время. Нужен, чтобы замечать замедление холодного старта
+    после перезапусков и деплоев.
+    """
+
+    def __init__(self) -> None:
+        self._original: Optional[object] = None
+        self._stack: List[float] = []
+        self._thread: Optional[int] = None
+        self._started = 0.0
+        self.total = 0.0
+        # Модуль -> (полное время, собственное время), в секундах
+        self.modules: Dict[str, Tuple[float, float]] = {}
+
+    def start(self) -> None:
+        """
+        Начинает замер. Учитываются только импорты в потоке, вызвавшем start.
+
+        :return: None
+        """
+        if self._original is not None:
+            return
+        self._original = builtins.__import__
+        self._thread = threading.get_ident()
+        self._started = time.perf_counter()
+        builtins.__import__ = self._import
+
+    def stop(self) -> None:
+        """
+        Завершает замер и возвращает стандартный __import__.
+
+        :return: None
+        """
+        if self._original is None:
+            return
+        builtins.__import__ = self._original
+        self._original = None
+        self.total = time.perf_counter() - self._started
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original
+        if original is None:
+            return builtins.__import__(name, globals, locals, fromlist, level)
+        if threading.get_ident() != self._thread:
+            return original(name, globals, locals, fromlist, level)
+        try:
+            module_name = (
+                resolve_name("." * level + name, (globals or {}).get("__package__"))
+                if level
+                else name
+            )
+        except (ImportError, ValueError):
+            module_name = name
+        if not module_name or module_name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        # Время вложенных импортов накапливается в верхнем элементе стека
+        self._stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            if module_name in sys.modules:
+                self.modules[module_name] = (elapsed, elapsed - nested)
+
+    def top(self, limit: int = 15) -> List[Tuple[str, float, float]]:
+        """
+        Возвращает самые долгие импорты по полному времени.
+
+        :param limit: Сколько модулей вернуть.
+        :return: Список кортежей (модуль, полное время, собственное время) в секундах.
+        """
+        items = sorted(self.modules.items(), key=lambda item: item[1][0], reverse=True)
+        return [(name, cumulative, own) for name, (cumulative, own) in items[:limit]]
+
+    def format(self, limit: int = 15) -> str:
+        """
+        Форматирует отчёт для лога.
+
+        :param limit: Сколько модулей включить в отчёт.
+        :return: Текст отчёта (str).
+        """
+        lines = [
+            f"Import time: {self.total * 1000:.0f} ms, modules: {len(self.modules)}",
+            f"{'cumulative, ms':>15} {'self, ms':>9}  module",
+        ]
+        for name, cumulative, own in self.top(limit):
+            lines.append(f"{cumulative * 1000:>15.1f} {own * 1000:>9.1f}  {name}")
+        return "\n".join(lines)
+
+
+import_report = ImportReport()
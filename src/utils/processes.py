@@ -0,0 +1,16 @@
+import multiprocessing
+
+
+def worker_context() -> multiprocessing.context.BaseContext:
+    """
+    Способ запуска рабочих процессов (RegexGuard, пул отрисовки графиков). fork в процессе
+    бота небезопасен: в нём уже работают потоки БД и цикл событий, и дочерний процесс
+    может унаследовать захваченные ими блокировки. forkserver один раз запускает чистый
+    однопоточный сервер и порождает процессы из него; где его нет, используется spawn.
+
+    :return: Контекст multiprocessing.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
@@ -0,0 +1,21 @@
+import os
+import shutil
+import tempfile
+
+# src.constants завершает процесс без этих переменных
+for name in ("TOKEN", "BOT_TOKEN", "API_ID", "API_HASH"):
+    os.environ.setdefault(name, "test")
+
+_workdir = tempfile.mkdtemp(prefix="antispam-tests-")
+_cwd = os.getcwd()
+
+
+def pytest_sessionstart(session):
+    # При импорте src.database создаётся antispam.db (и logs/) в текущей директории,
+    # поэтому тестовые модули импортируются во временной директории
+    os.chdir(_workdir)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    os.chdir(_cwd)
+    shutil.rmtree(_workdir, ignore_errors=True)
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from src.database import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "antispam.db"))
+    database.write_behind.max_delay = 60
+    yield database
+    database.close()
+
+
+def warn(database, user_id, times=3):
+    async def scenario():
+        for _ in range(times):
+            database.add_spam_warning(user_id, -100, "spam")
+
+    # Внутри цикла событий предупреждения остаются в очереди до сброса
+    asyncio.run(scenario())
+
+
+def pending_in_db(database, user_id):
+    with database.connections.read() as cursor:
+        cursor.execute("SELECT ban_pending FROM users WHERE user_id = ?", (user_id,))
+        return cursor.fetchone()[0]
+
+
+def test_confirm_ban_clears_pending(database):
+    warn(database, 1)
+    assert database.is_ban_pending(1)
+    assert database.confirm_ban(1)
+    assert not database.is_ban_pending(1)
+    assert pending_in_db(database, 1) == 0
+    # Забаненный пользователь больше не помечается
+    warn(database, 1, times=1)
+    assert not database.is_ban_pending(1)
+
+
+def test_reject_ban_resets_warnings(database):
+    warn(database, 2)
+    assert database.reject_ban(2)
+    assert not database.is_ban_pending(2)
+    assert pending_in_db(database, 2) == 0
+    warn(database, 2, times=2)
+    assert not database.is_ban_pending(2)
@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+import pytest
+
+from src.database import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "antispam.db"))
+    yield database
+    database.close()
+
+
+def test_messages_are_counted_by_day(database):
+    today = str(date.today())
+    database.add_message(-100, 1, "привет", False)
+    database.add_message(-100, 1, "казино", True)
+    database.add_message(-100, 2, "привет", False)
+    database.add_message(-200, 3, "привет", False)
+
+    # (день, всего, спам, удалено, забанено, разных авторов)
+    assert database.get_daily_stats(-100) == [(today, 3, 1, 0, 0, 2)]
+    assert database.get_daily_stats(-200) == [(today, 1, 0, 0, 0, 1)]
+
+
+def test_deleted_and_banned_share_the_message_day(database):
+    database.add_message(-100, 1, "казино", True)
+    database.update_stats(-100, deleted=True)
+    database.update_stats(-100, deleted=True, banned=True)
+
+    assert database.get_daily_stats(-100) == [(str(date.today()), 1, 1, 2, 1, 1)]
+
+
+
+def test_old_authors_are_pruned_when_the_day_changes(database):
+    today = date.today()
+    database.add_message(-100, 1, "привет", False)
+    with database.connections.write() as cursor:
+        cursor.execute(
+            "INSERT INTO chat_daily_users (chat_id, day, user_id) VALUES (?, ?, ?)",
+            (-100, str(today - timedelta(days=3)), 1),
+        )
+    # Бот работал со вчерашнего дня
+    database.daily_users_day = today - timedelta(days=1)
+    database.add_message(-100, 2, "привет", False)
+
+    with database.connections.read() as cursor:
+        cursor.execute("SELECT day FROM chat_daily_users ORDER BY user_id")
+        assert cursor.fetchall() == [(str(today),), (str(today),)]
@@ -0,0 +1,75 @@
+import random
+import re
+
+import pytest
+
+from src.spam.engines import (
+    AhoCorasick,
+    HybridEngine,
+    LegacyRegexEngine,
+    select_spans,
+)
+
+# Маленький алфавит, чтобы слова часто пересекались и были префиксами друг друга;
+# точка и $ проверяют, что экранированные записи не становятся регулярками
+ALPHABET = "ab.$в_ "
+
+
+def random_keywords(rng: random.Random) -> list:
+    words = {
+        "".join(rng.choices(ALPHABET.strip(), k=rng.randint(1, 5)))
+        for _ in range(rng.randint(1, 12))
+    }
+    # Как в KeywordRegistry: сначала длинные, поэтому альтернатива re выбирает
+    # самое длинное из слов, начинающихся в одной позиции
+    return sorted(words, key=lambda w: (-len(w), w))
+
+
+def random_text(rng: random.Random) -> str:
+    return "".join(rng.choices(ALPHABET, k=rng.randint(0, 40)))
+
+
+@pytest.mark.parametrize("whole_words", [False, True])
+def test_hybrid_matches_legacy_on_literals(whole_words):
+    rng = random.Random(1)
+    for _ in range(2000):
+        # Литералы в списках хранятся экранированными
+        keywords = list(map(re.escape, random_keywords(rng)))
+        text = random_text(rng)
+        assert HybridEngine(keywords).find_all(text, whole_words) == LegacyRegexEngine(
+            keywords
+        ).find_all(text, whole_words), (keywords, text)
+
+
+def test_hybrid_matches_re_on_mixed_patterns():
+    keywords = ["казино", r"\d{3,}", "free money", r"ставк[аи]", "к"]
+    text = "бесплатное казино, ставки 1000 и free money по ставка"
+    expected = [
+        match.span()
+        for match in re.finditer("|".join(keywords), text)
+        if match.end() > match.start()
+    ]
+    assert HybridEngine(keywords).find_all(text) == expected
+
+
+def test_aho_corasick_finds_all_occurrences():
+    rng = random.Random(2)
+    for _ in range(1000):
+        words = random_keywords(rng)
+        text = random_text(rng)
+        expected = sorted(
+            (start, start + len(word))
+            for word in words
+            for start in range(len(text))
+            if text.startswith(word, start)
+        )
+        assert sorted(AhoCorasick(words).find_all(text)) == expected, (words, text)
+
+
+def test_select_spans_prefers_leftmost_then_longest():
+    assert select_spans([(2, 4), (0, 2), (0, 3), (3, 6), (6, 7)]) == [
+        (0, 3),
+        (3, 6),
+        (6, 7),
+    ]
+    assert select_spans([(1, 1), (0, 0)]) == []
@@ -0,0 +1,27 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.graphs import GraphRenderer
+
+
+def crash(_: tuple) -> str:
+    os._exit(1)
+
+
+def touch(data: tuple) -> str:
+    file_path = data[-2]
+    open(file_path, "wb").close()
+    return file_path
+
+
+def test_pool_is_restarted_after_worker_crash(tmp_path):
+    renderer = GraphRenderer(workers=1)
+    try:
+        with pytest.raises(BrokenProcessPool):
+            renderer._submit("chat_1", crash, (1,), str(tmp_path)).result(timeout=30)
+        path = renderer._submit("chat_2", touch, (2,), str(tmp_path)).result(timeout=30)
+        assert os.path.exists(path)
+    finally:
+        renderer.close()
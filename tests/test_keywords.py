@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from src.database import db
+from src.spam.keywords import KeywordRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    words_file = tmp_path / "bad_words.txt"
+    words_file.write_text("t.me\n100$\nfree money\n", encoding="utf-8")
+    return KeywordRegistry(str(words_file))
+
+
+def found(registry, text, chat_id=None):
+    return [text[start:end] for start, end in registry.get(chat_id).find(text)]
+
+
+def test_global_words_are_literal_text(registry):
+    assert found(registry, "join t.me/channel") == ["t.me"]
+    assert found(registry, "tome") == []
+    assert found(registry, "pay 100$ now") == ["100$"]
+    # Пробел в записи файла означает любой пробельный символ
+    assert found(registry, "free\nmoney") == ["free\nmoney"]
+
+
+def test_only_valid_chat_regexes_are_guarded(registry):
+    chat_id = -100500
+    assert db.add_chat_badword(chat_id, "t.me", 1)
+    assert db.add_chat_badword(chat_id, "ca(sino", 1)
+    asyncio.run(registry.load(chat_id))
+
+    matcher = registry.get(chat_id)
+    # Невалидный паттерн сохранён экранированным и ищется как текст
+    assert matcher.guarded == ["t.me"]
+    assert "ca\\(sino" in matcher.keywords
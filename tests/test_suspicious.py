@@ -0,0 +1,52 @@
+import random
+import re
+
+from src.spam.suspicious import SUSPICIOUS_RULES, detect_suspicious
+
+# Прежние регулярки из search_keywords, которые заменил токенный детектор
+LEGACY_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"\b(прем|премиум|premium)\b.*?@\w+",
+        r"@\w+.*?\b(прем|премиум|premium)\b",
+        r"\b(тут|here)\b.*?@\w+",
+        r"@\w+.*?\b(тут|here)\b",
+        r"➡️.*?@\w+",
+        r"@\w+.*?➡️",
+    )
+]
+
+# Фрагменты, из которых собираются случайные тексты: триггеры в разных регистрах,
+# упоминания, стрелки, переводы строк и "почти триггеры"
+PIECES = [
+    "premium", "PREMİUM", "прем", "премиум", "ПРЕМ", "тут", "ТУТ", "here", "HeRe",
+    "@", "@@", "➡️", "➡", "\n", " ", "x", "_", "ab", "-", ".", "1", "premiumx", "hereby",
+]  # fmt: skip
+
+
+def legacy_rules(text: str) -> list:
+    return [
+        rule for rule, pattern in zip(SUSPICIOUS_RULES, LEGACY_PATTERNS)
+        if pattern.search(text)
+    ]  # fmt: skip
+
+
+def check_equivalence(rng: random.Random, cases: int) -> None:
+    for _ in range(cases):
+        text = "".join(rng.choices(PIECES, k=rng.randint(0, 12)))
+        expected, actual = legacy_rules(text), detect_suspicious(text)
+        assert expected == actual, (text, expected, actual)
+
+
+def test_detector_matches_legacy_patterns():
+    check_equivalence(random.Random(42), cases=10_000)
+
+
+def test_detector_examples():
+    assert detect_suspicious("Premium тут: @seller") == [
+        "premium_before_mention",
+        "here_before_mention",
+    ]
+    assert detect_suspicious("@seller ➡️") == ["mention_before_arrow"]
+    assert detect_suspicious("premiumx @seller") == []
+    assert detect_suspicious("") == []
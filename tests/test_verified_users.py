@@ -0,0 +1,23 @@
+import pytest
+
+from src.database import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "antispam.db"))
+    yield database
+    database.close()
+
+
+def test_add_verified_user(database):
+    user_data = {
+        "first_name": "Ivan",
+        "username": "ivan",
+        "first_msg_date": "2020-01-01",
+        "messages_count": 10,
+        "chats_count": 2,
+    }
+    assert database.add_verified_user(5, user_data)
+    assert database.is_user_verified(5)
+    assert database.get_verified_users([5, 6]) == {5}
@@ -0,0 +1,101 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.database import AsyncDatabase, ConnectionManager, Database, WriteBehindQueue
+
+
+@pytest.fixture
+def connections(tmp_path):
+    manager = ConnectionManager(str(tmp_path / "queue.db"))
+    with manager.write() as cursor:
+        cursor.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, state TEXT)")
+    yield manager
+    manager.close()
+
+
+def read_items(connections):
+    with connections.read() as cursor:
+        cursor.execute("SELECT id, state FROM items ORDER BY id")
+        return cursor.fetchall()
+
+
+def test_queries_of_different_kinds_keep_their_order(connections):
+    queue = WriteBehindQueue(connections, max_delay=60)
+    insert = "INSERT INTO items (id, state) VALUES (?, ?)"
+    update = "UPDATE items SET state = ? WHERE id = ?"
+
+    async def scenario():
+        queue.add(insert, (1, "new"))
+        queue.add(update, ("done", 1))
+        # Обновление раньше вставки ничего не меняет
+        queue.add(update, ("early", 2))
+        queue.add(insert, (2, "new"))
+        queue.add(insert, (3, "new"))
+        queue.add(update, ("done", 3))
+        # Внутри цикла событий запись откладывается до flush
+        assert len(queue) == 6
+        assert read_items(connections) == []
+        queue.flush()
+
+    asyncio.run(scenario())
+    assert read_items(connections) == [(1, "done"), (2, "new"), (3, "done")]
+
+
+def test_failed_row_does_not_drop_the_batch(connections):
+    queue = WriteBehindQueue(connections, max_delay=60)
+    insert = "INSERT INTO items (id, state) VALUES (?, ?)"
+
+    async def scenario():
+        queue.add(insert, (1, "a"))
+        queue.add(insert, (1, "duplicate"))
+        queue.add(insert, (2, "b"))
+        queue.flush()
+
+    asyncio.run(scenario())
+    assert read_items(connections) == [(1, "a"), (2, "b")]
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "antispam.db"))
+    database.write_behind.max_delay = 60
+    return database
+
+
+def count_messages(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+
+def test_reads_see_pending_writes(database):
+    adb = AsyncDatabase(database)
+
+    async def scenario():
+        for user_id in range(3):
+            await adb.add_message(-100, user_id, "text", False)
+        assert len(database.write_behind) == 3
+        # Чтение в потоке читателей дожидается записи очереди в потоке записи
+        return await adb.get_daily_stats(-100)
+
+    try:
+        rows = asyncio.run(scenario())
+    finally:
+        adb.close()
+    assert [row[1] for row in rows] == [3]
+
+
+def test_close_flushes_pending_writes(database, tmp_path):
+    adb = AsyncDatabase(database)
+
+    async def scenario():
+        for user_id in range(5):
+            await adb.add_message(-100, user_id, "text", False)
+        await adb.update_stats(-100, messages=True)
+
+    asyncio.run(scenario())
+    assert len(database.write_behind) == 6
+    adb.close()
+    assert len(database.write_behind) == 0
+    assert count_messages(str(tmp_path / "antispam.db")) == 5